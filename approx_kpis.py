@@ -0,0 +1,81 @@
+"""
+표본 기반 빠른 KPI 추정 (성과 분석 페이지의 '빠른 미리보기' 모드)
+
+(캠페인 × 플랫폼) 층(stratum)마다 포함 확률 π를 정해 표본을 뽑고,
+Horvitz-Thompson 가중치(1/π)로 합계 / 비율 KPI와 95% 신뢰구간을 추정합니다.
+
+    - 행마다 고정 난수(_u)를 한 번만 붙이고 '_u < π'인 행을 표본으로 씁니다.
+      → 1% 표본 ⊂ 10% 표본 ⊂ 전체 가 되어, 단계가 올라갈수록 같은 데이터 위에서 정밀해집니다.
+    - 작은 층도 최소 MIN_PER_STRATUM개 정도는 뽑히도록 π를 올려줍니다. (작은 캠페인/플랫폼 누락 방지)
+    - 합계(매출, 비용)는 HT 추정량, 비율(ROAS, CTR 등)은 선형화(delta method) 분산으로 구간을 계산합니다.
+"""
+import numpy as np
+
+STRATA = ['campaign_id', 'platform']
+SAMPLE_FRACTIONS = [0.01, 0.1]   # 미리보기 단계 (마지막은 항상 전체 = 정확값)
+MIN_PER_STRATUM = 30
+Z_95 = 1.96
+SEED = 42
+SUM_COLUMNS = ['revenue', 'actual_cost', 'clicks', 'conversions', 'impressions']
+KEY_COLUMNS = ['_u', '_stratum_n']  # add_sampling_keys가 붙이는 내부 컬럼 (화면에 보여줄 때는 제외)
+
+
+def add_sampling_keys(df, seed=SEED):
+    """행마다 고정 난수(_u)와 소속 층의 행 수(_stratum_n)를 붙입니다. (데이터가 바뀔 때 한 번만 계산)"""
+    codes = df.groupby(STRATA, dropna=False, sort=False).ngroup().to_numpy()
+    stratum_n = np.bincount(codes)[codes] if len(codes) else codes
+    rng = np.random.default_rng(seed)
+    return df.assign(_u=rng.random(len(df)), _stratum_n=stratum_n)
+
+def inclusion_prob(stratum_n, fraction):
+    """층 크기별 포함 확률: 기본은 fraction, 작은 층은 최소 MIN_PER_STRATUM개가 기대되도록 올림"""
+    stratum_n = np.asarray(stratum_n, dtype=np.float64)
+    return np.minimum(1.0, np.maximum(fraction, MIN_PER_STRATUM / np.maximum(stratum_n, 1)))
+
+def draw_sample(df, fraction):
+    """층화 표본 추출 → 포함 확률(_pi) 컬럼이 붙은 표본 DataFrame"""
+    pi = inclusion_prob(df['_stratum_n'].to_numpy(), fraction)
+    keep = df['_u'].to_numpy() < pi
+    return df[keep].assign(_pi=pi[keep])
+
+def weighted(df_sample):
+    """
+    합계 컬럼에 가중치(1/π)를 곱한 표본을 반환합니다.
+    → 기존 차트 코드(groupby + sum)를 그대로 쓰면 '전체 합계의 추정치'가 그려집니다.
+    """
+    w = 1.0 / df_sample['_pi'].to_numpy()
+    return df_sample.assign(**{col: df_sample[col].to_numpy() * w for col in SUM_COLUMNS})
+
+def estimate_kpis(df, pi=None):
+    """
+    KPI 추정값과 95% 신뢰구간 → {지표: (값, 하한, 상한)}
+    pi를 주지 않으면 전수 데이터로 보고 정확값을 계산합니다. (구간 폭 0)
+    """
+    pi = np.ones(len(df)) if pi is None else np.asarray(pi, dtype=np.float64)
+    w = 1.0 / pi
+    var_coef = (1 - pi) / pi ** 2  # 각 행이 독립적으로 뽑힌 표본(푸아송 표본)의 HT 분산 계수
+    x = {col: np.nan_to_num(df[col].to_numpy(dtype=np.float64)) for col in SUM_COLUMNS}
+    totals = {col: float(np.sum(w * values)) for col, values in x.items()}
+
+    def total_ci(col):
+        half = Z_95 * np.sqrt(np.sum(var_coef * x[col] ** 2))
+        return totals[col], totals[col] - half, totals[col] + half
+
+    def ratio_ci(numerator, denominator):
+        if totals[denominator] <= 0:
+            return 0.0, 0.0, 0.0  # (0으로 나누기 방지 → 페이지와 동일하게 0 표시)
+        ratio = totals[numerator] / totals[denominator]
+        residual = (x[numerator] - ratio * x[denominator]) / totals[denominator]
+        half = Z_95 * np.sqrt(np.sum(var_coef * residual ** 2))
+        return ratio, ratio - half, ratio + half
+
+    return {
+        'revenue': total_ci('revenue'),
+        'cost': total_ci('actual_cost'),
+        'roas': ratio_ci('revenue', 'actual_cost'),
+        'cvr': ratio_ci('conversions', 'clicks'),
+        'ctr': ratio_ci('clicks', 'impressions'),
+        'aov': ratio_ci('revenue', 'conversions'),
+        'cpc': ratio_ci('actual_cost', 'clicks'),
+        'cpa': ratio_ci('actual_cost', 'conversions'),
+    }
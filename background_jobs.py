@@ -0,0 +1,122 @@
+"""
+백그라운드 작업 실행 / 중복 실행 방지
+
+대시보드 페이지는 오래 걸리는 작업(데이터 품질 스캔, GenAI 보강)을 직접 실행하지 않고
+별도 프로세스로 띄운 뒤 결과 파일만 읽습니다.
+여러 브라우저 세션에서 같은 작업을 동시에 띄우지 않도록 table/ 폴더의 잠금 파일을 사용합니다.
+
+    - 잠금은 '작업 프로세스 자신'이 잡고 있다가 끝나면 풉니다. (acquire)
+    - OS 파일 잠금이라 작업이 비정상 종료돼도 잠금이 자동으로 풀립니다. (오래된 PID 파일 문제 없음)
+    - 페이지는 잠금 여부로 실행 중인지 확인하고, 실행 중이 아닐 때만 새로 띄웁니다. (launch)
+    - 작업은 끝날 때 성공/실패를 상태 파일에 남깁니다. (save_status)
+      → 같은 입력으로 이미 실패했다면 페이지가 매번 다시 띄우지 않고 실패 내용과 로그를 보여줍니다.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import deque
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BASE_PATH = "table/"
+
+
+def lock_path(name, base_path=BASE_PATH):
+    return os.path.join(base_path, f".{name}.lock")
+
+def log_path(name, base_path=BASE_PATH):
+    return os.path.join(base_path, f"{name}.log")
+
+def status_path(name, base_path=BASE_PATH):
+    return os.path.join(base_path, f".{name}.status.json")
+
+def _try_lock(lock_file):
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def release(lock_file):
+    """acquire()로 잡은 잠금을 풉니다."""
+    if fcntl is None:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    lock_file.close()
+
+def acquire(name, base_path=BASE_PATH):
+    """
+    작업 잠금을 잡습니다. (작업 프로세스 시작 시 호출)
+    반환값: 잠금 파일 객체 (끝나면 release 호출) / 다른 프로세스가 이미 실행 중이면 None
+    """
+    lock_file = open(lock_path(name, base_path), 'a+', encoding='utf-8')
+    if not _try_lock(lock_file):
+        lock_file.close()
+        return None
+    lock_file.truncate(0)
+    lock_file.write(str(os.getpid()))  # (확인용 PID 기록)
+    lock_file.flush()
+    return lock_file
+
+def is_running(name, base_path=BASE_PATH):
+    """다른 프로세스가 이 작업의 잠금을 잡고 있으면 True"""
+    if not os.path.exists(lock_path(name, base_path)):
+        return False
+    lock_file = acquire(name, base_path)
+    if lock_file is None:
+        return True
+    release(lock_file)
+    return False
+
+def save_status(name, key, error=None, base_path=BASE_PATH):
+    """
+    작업 결과를 기록합니다. (작업 프로세스가 끝날 때 호출)
+    key: 어떤 입력으로 실행했는지 (예: CSV 수정 시각 리스트, JSON으로 저장 가능한 값)
+    """
+    path = status_path(name, base_path)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({
+            'key': key,
+            'ok': error is None,
+            'error': error,
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+        }, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+def failed_for(name, key, base_path=BASE_PATH):
+    """같은 입력(key)으로 실행했다가 실패한 기록이 있으면 그 기록(dict), 없으면 None"""
+    try:
+        with open(status_path(name, base_path), encoding='utf-8') as f:
+            status = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return status if not status['ok'] and status['key'] == key else None
+
+def log_tail(name, base_path=BASE_PATH, lines=20):
+    """작업 로그의 마지막 몇 줄"""
+    try:
+        with open(log_path(name, base_path), encoding='utf-8', errors='replace') as f:
+            return ''.join(deque(f, maxlen=lines))
+    except FileNotFoundError:
+        return ''
+
+def launch(script, name, args=(), base_path=BASE_PATH):
+    """
+    작업이 실행 중이 아니면 별도 프로세스로 띄웁니다. (출력은 table/<name>.log)
+    반환값: 새로 띄웠으면 True, 이미 실행 중이면 False
+    """
+    if is_running(name, base_path):
+        return False
+    with open(log_path(name, base_path), 'w', encoding='utf-8') as log_file:
+        subprocess.Popen([sys.executable, script, *args], stdout=log_file, stderr=subprocess.STDOUT)
+    return True
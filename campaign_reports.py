@@ -0,0 +1,331 @@
+"""
+캠페인별 리포트 사전 생성(pre-render)
+
+campaign_master의 모든 캠페인에 대해 KPI를 계산하고 차트를 그려서
+HTML / PNG / Excel 파일로 reports/ 폴더에 미리 만들어 둡니다.
+성과 분석 대시보드는 이 파일을 '바로 다운로드'로 제공합니다.
+
+동작 방식
+    1. 4개 테이블을 JOIN한 뒤, 캠페인별로 행 해시를 합쳐 '데이터 버전'을 만듭니다.
+    2. reports/manifest.json에 저장된 버전과 같으면 건너뛰고, 바뀐 캠페인만 다시 생성합니다.
+    3. 생성 작업은 ProcessPoolExecutor로 여러 프로세스에 나눠서 실행합니다.
+    4. 현재 데이터 버전은 reports/versions.json에도 저장합니다. 대시보드는 이 파일과 manifest만 비교해서
+       '데이터 변경됨' 표시를 합니다. (CSV가 바뀌면 대시보드가 --versions-only를 백그라운드로 실행)
+
+선택 패키지
+    - PNG: kaleido (없으면 PNG만 건너뜀)
+    - Excel: openpyxl (없으면 Excel만 건너뜀)
+
+사용법
+    python campaign_reports.py               # 변경된 캠페인만 생성
+    python campaign_reports.py --force       # 전체 재생성
+    python campaign_reports.py --workers 8
+    python campaign_reports.py --versions-only   # 리포트는 만들지 않고 현재 데이터 버전만 갱신
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from html import escape
+
+import pandas as pd
+import plotly.express as px
+
+import background_jobs
+import data_quality
+import genai_enrichment
+
+# --- [1] 파일 경로 / 설정 ---
+BASE_PATH = "table/"
+REPORT_DIR = "reports/"
+MANIFEST_FILE = 'manifest.json'
+VERSIONS_FILE = 'versions.json'
+REPORT_VERSION = 'v1'  # 리포트 레이아웃을 바꾸면 올려서 전체 재생성
+EXCEL_MAX_DATA_ROWS = 1_048_575  # Excel 시트 최대 행 수(1,048,576) - 헤더 1행
+
+
+# --- [2] 데이터 로드 + JOIN (성과 분석 페이지와 동일한 방식) ---
+def load_tables(base_path=BASE_PATH):
+    """4개 테이블을 읽고 GenAI 결과 테이블을 합칩니다. 반환값: (성과, 캠페인, 제품, 인플루언서)"""
+    df_perf = pd.read_csv(os.path.join(base_path, 'campaign_performance.csv'))
+    df_camp = pd.read_csv(os.path.join(base_path, 'campaign_master.csv'))
+    df_prod = pd.read_csv(os.path.join(base_path, 'product_master.csv'))
+    df_inf = pd.read_csv(os.path.join(base_path, 'influencer_master.csv'))
+    df_perf = genai_enrichment.apply_results(df_perf, 'posts', base_path)
+    df_inf = genai_enrichment.apply_results(df_inf, 'influencers', base_path)
+    return df_perf, df_camp, df_prod, df_inf
+
+def merge_tables(df_perf, df_camp, df_prod, df_inf):
+    """4개 테이블 JOIN"""
+    df_merged = pd.merge(df_perf, df_camp, on='campaign_id', how='left')
+    df_merged = pd.merge(df_merged, df_prod, on='product_id', how='left')
+    return pd.merge(df_merged, df_inf, on='inf_id', how='left', suffixes=('_perf', '_inf'))
+
+def _row_hashes(df):
+    """
+    행마다 해시 (숫자 컬럼은 float64로 통일해서 해시)
+    → 결측치 한 건 때문에 정수 컬럼 전체가 실수로 바뀌어도 값이 같은 행은 해시가 그대로 유지됨
+    """
+    normalized = df.apply(
+        lambda col: col.astype('float64') if pd.api.types.is_numeric_dtype(col) else col.astype(str)
+    )
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+def campaign_versions(df_perf, df_camp, df_prod, df_inf):
+    """
+    캠페인별 '데이터 버전' = 아래 해시들을 이어붙인 문자열. 해당 캠페인과 관련된 행이 바뀔 때만 달라집니다.
+        - 그 캠페인의 성과 행 해시 합 + 행 수
+        - 캠페인 마스터 행 / 연결된 제품 행 해시
+        - 성과 행이 참조하는 인플루언서 행 해시 합 (마스터에 없는 inf_id는 0)
+    JOIN 결과가 아니라 원본 테이블을 각각 해시하므로, 다른 캠페인의 데이터(연결 끊긴 행 등)가
+    JOIN 후 컬럼 dtype을 바꿔도 버전에는 영향이 없습니다.
+    """
+    perf = _row_hashes(df_perf).groupby(df_perf['campaign_id'].to_numpy()).agg(['sum', 'count'])
+    camp = _row_hashes(df_camp).groupby(df_camp['campaign_id'].to_numpy()).sum()
+    prod = _row_hashes(df_prod).groupby(df_prod['product_id'].to_numpy()).sum()
+    inf = _row_hashes(df_inf).groupby(df_inf['inf_id'].to_numpy()).sum()
+
+    used_inf = df_perf[['campaign_id', 'inf_id']].drop_duplicates()
+    inf_hashes = inf.reindex(used_inf['inf_id'].to_numpy(), fill_value=0)  # (map/fillna는 float로 바뀌어 해시가 깨짐)
+    inf_by_campaign = inf_hashes.groupby(used_inf['campaign_id'].to_numpy()).sum()
+    product_of = df_camp.drop_duplicates('campaign_id').set_index('campaign_id')['product_id']
+
+    versions = {}
+    for campaign_id in df_camp['campaign_id']:
+        row_sum, row_count = perf.loc[campaign_id] if campaign_id in perf.index else (0, 0)
+        parts = [row_sum, row_count, camp[campaign_id], prod.get(product_of[campaign_id], 0), inf_by_campaign.get(campaign_id, 0)]
+        versions[campaign_id] = REPORT_VERSION + ''.join(f"-{int(part):x}" for part in parts)
+    return versions
+
+
+# --- [3] KPI 계산 ---
+def compute_kpis(df):
+    """
+    성과 분석 페이지와 같은 공식으로 KPI를 계산합니다. (0으로 나누기 방지 포함)
+    df는 페이지와 같은 기준으로 걸러진 행이어야 합니다. (연결 끊긴 inf_id 행 제외 → build_reports에서 처리)
+    """
+    total_revenue = df['revenue'].sum()
+    total_cost = df['actual_cost'].sum()
+    total_clicks = df['clicks'].sum()
+    total_conversions = df['conversions'].sum()
+    total_impressions = df['impressions'].sum()
+    return {
+        '총 매출 (Revenue)': total_revenue,
+        '총 비용 (Cost)': total_cost,
+        'ROAS': (total_revenue / total_cost) if total_cost > 0 else 0,
+        'CTR': (total_clicks / total_impressions) if total_impressions > 0 else 0,
+        'CVR': (total_conversions / total_clicks) if total_clicks > 0 else 0,
+        'AOV': (total_revenue / total_conversions) if total_conversions > 0 else 0,
+        'CPC': (total_cost / total_clicks) if total_clicks > 0 else 0,
+        'CPA': (total_cost / total_conversions) if total_conversions > 0 else 0,
+    }
+
+
+# --- [4] 캠페인 1개 리포트 생성 (프로세스 풀에서 실행) ---
+def _build_charts(df, campaign_name):
+    df = df.assign(post_date=pd.to_datetime(df['post_date'], errors='coerce'))
+
+    time_series = df.groupby(df['post_date'].dt.date)['revenue'].sum().reset_index()
+    time_series = time_series.rename(columns={'post_date': '날짜', 'revenue': '매출액'})
+    fig_time = px.line(time_series, x='날짜', y='매출액', title=f'{campaign_name} - 날짜별 매출 추이',
+                       markers=True, template='plotly_white')
+
+    inf_perf = df.groupby('inf_name').agg(
+        total_cost=('actual_cost', 'sum'),
+        total_revenue=('revenue', 'sum'),
+        platform=('platform', 'first')
+    ).reset_index()
+    fig_scatter = px.scatter(inf_perf, x='total_cost', y='total_revenue', color='platform', hover_name='inf_name',
+                             title=f'{campaign_name} - 인플루언서별 비용 vs 매출',
+                             labels={'total_cost': '총 집행 비용 (원)', 'total_revenue': '총 발생 매출 (원)'},
+                             template='plotly_white')
+
+    platform_perf = df.groupby('platform').agg(revenue=('revenue', 'sum'), actual_cost=('actual_cost', 'sum')).reset_index()
+    platform_perf['ROAS'] = (platform_perf['revenue'] / platform_perf['actual_cost']).fillna(0)
+    fig_platform = px.bar(platform_perf.sort_values(by='ROAS', ascending=False), x='platform', y='ROAS',
+                          title=f'{campaign_name} - 플랫폼별 ROAS', color='platform', template='plotly_white')
+    fig_platform.update_yaxes(tickformat=".1%")
+
+    return {'time': fig_time, 'influencer': fig_scatter, 'platform': fig_platform}, inf_perf, time_series
+
+def render_campaign_report(campaign_id, campaign_name, df, report_dir):
+    """
+    캠페인 1개의 HTML / PNG / Excel 리포트를 만듭니다.
+    반환값: {'html': 파일명, 'png': 파일명, 'xlsx': 파일명} (선택 패키지가 없으면 해당 형식은 빠짐)
+    """
+    kpis = compute_kpis(df)
+    figs, inf_perf, time_series = _build_charts(df, campaign_name)
+    files = {}
+
+    # 4-1. HTML (KPI 표 + 인터랙티브 차트)
+    kpi_table = pd.DataFrame({'지표': list(kpis.keys()), '값': list(kpis.values())}).to_html(index=False)
+    chart_html = [
+        fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False)
+        for i, fig in enumerate(figs.values())
+    ]
+    title = escape(f"{campaign_name} ({campaign_id})")
+    html = (
+        f"<html><head><meta charset='utf-8'><title>{title} 리포트</title></head><body>"
+        f"<h1>{title}</h1>"
+        f"<p>생성 시각: {datetime.now():%Y-%m-%d %H:%M} / 성과 데이터 {len(df):,}건</p>"
+        f"<h2>핵심 성과 지표</h2>{kpi_table}<h2>상세 분석 차트</h2>{''.join(chart_html)}</body></html>"
+    )
+    files['html'] = f"{campaign_id}.html"
+    with open(os.path.join(report_dir, files['html']), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    # 4-2. PNG (날짜별 매출 추이 차트, kaleido 필요)
+    try:
+        files['png'] = f"{campaign_id}.png"
+        figs['time'].write_image(os.path.join(report_dir, files['png']))
+    except (ImportError, ValueError, RuntimeError):
+        files.pop('png')
+
+    # 4-3. Excel (KPI / 일별 매출 / 인플루언서 / 원본 시트, openpyxl 필요)
+    # (원본 행이 Excel 시트 한도를 넘으면 '원본' 시트는 빼고 안내 시트만 넣음)
+    try:
+        files['xlsx'] = f"{campaign_id}.xlsx"
+        with pd.ExcelWriter(os.path.join(report_dir, files['xlsx'])) as writer:
+            pd.DataFrame([kpis]).to_excel(writer, sheet_name='KPI', index=False)
+            time_series.to_excel(writer, sheet_name='일별 매출', index=False)
+            inf_perf.to_excel(writer, sheet_name='인플루언서', index=False)
+            if len(df) <= EXCEL_MAX_DATA_ROWS:
+                df.to_excel(writer, sheet_name='원본', index=False)
+            else:
+                pd.DataFrame({'안내': [
+                    f"원본 {len(df):,}행은 Excel 시트 한도({EXCEL_MAX_DATA_ROWS:,}행)를 넘어서 포함하지 않았습니다. "
+                    "대시보드의 '필터링된 원본 데이터 보기'를 이용해주세요."
+                ]}).to_excel(writer, sheet_name='원본', index=False)
+    except (ImportError, ValueError):
+        files.pop('xlsx')
+
+    return files
+
+
+# --- [5] 전체 실행 ---
+def load_manifest(report_dir=REPORT_DIR):
+    """생성된 리포트 목록 {campaign_id: {'version', 'campaign_name', 'generated_at', 'files'}}"""
+    try:
+        with open(os.path.join(report_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_manifest(manifest, report_dir):
+    path = os.path.join(report_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)  # 대시보드가 읽는 도중에도 깨진 파일을 보지 않도록
+
+def source_key(base_path=BASE_PATH):
+    """버전 계산에 쓰인 입력 파일들의 수정 시각 (대시보드의 데이터 버전 키와 같은 값)"""
+    return list(data_quality.tables_mtime(base_path) + genai_enrichment.results_mtime(base_path))
+
+def load_versions(report_dir=REPORT_DIR):
+    """마지막으로 계산한 현재 데이터 버전 {'key': source_key, 'versions': {캠페인 ID: 버전}} (없으면 None)"""
+    try:
+        with open(os.path.join(report_dir, VERSIONS_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _save_versions(versions, key, report_dir):
+    path = os.path.join(report_dir, VERSIONS_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'versions': versions}, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+
+def update_versions(base_path=BASE_PATH, report_dir=REPORT_DIR):
+    """리포트는 만들지 않고 현재 데이터 버전만 계산해서 저장합니다."""
+    os.makedirs(report_dir, exist_ok=True)
+    key = source_key(base_path)  # (읽기 전에 기록 → 계산 도중 파일이 바뀌면 다음 번에 다시 계산됨)
+    versions = campaign_versions(*load_tables(base_path))
+    _save_versions(versions, key, report_dir)
+    return versions
+
+def build_reports(base_path=BASE_PATH, report_dir=REPORT_DIR, workers=None, force=False):
+    """
+    데이터 버전이 바뀐 캠페인만 리포트를 다시 만듭니다.
+    반환값: (생성된 캠페인 ID 리스트, 실패한 {캠페인 ID: 오류 메시지})
+    """
+    os.makedirs(report_dir, exist_ok=True)
+    key = source_key(base_path)
+    df_perf, df_camp, df_prod, df_inf = load_tables(base_path)
+    versions = campaign_versions(df_perf, df_camp, df_prod, df_inf)
+    _save_versions(versions, key, report_dir)
+    manifest = {} if force else load_manifest(report_dir)
+
+    # 5-1. 삭제된 캠페인은 목록에서 제거, 버전이 바뀐 캠페인만 골라냄
+    manifest = {cid: entry for cid, entry in manifest.items() if cid in versions}
+    todo = [cid for cid, version in versions.items() if manifest.get(cid, {}).get('version') != version]
+    if not todo:
+        _save_manifest(manifest, report_dir)
+        return [], {}
+
+    names = df_camp.drop_duplicates('campaign_id').set_index('campaign_id')['campaign_name']
+    df_merged = merge_tables(df_perf[df_perf['campaign_id'].isin(todo)], df_camp, df_prod, df_inf)  # (다시 만들 캠페인 행만 JOIN)
+    df_merged = df_merged[df_merged['inf_name'].notna()]  # (대시보드와 같이 인플루언서 마스터에 없는 inf_id 행은 제외)
+    rows_by_campaign = {cid: rows for cid, rows in df_merged.groupby('campaign_id')}
+
+    # 5-2. 프로세스 풀로 분산 생성
+    built, failed = [], {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                render_campaign_report, cid, names[cid],
+                rows_by_campaign.get(cid, df_merged.iloc[:0]), report_dir
+            ): cid
+            for cid in todo
+        }
+        for future in as_completed(futures):
+            cid = futures[future]
+            try:
+                files = future.result()
+            except Exception as e:
+                failed[cid] = str(e)
+                continue
+            manifest[cid] = {
+                'version': versions[cid],
+                'campaign_name': names[cid],
+                'generated_at': datetime.now().isoformat(timespec='seconds'),
+                'files': files,
+            }
+            built.append(cid)
+
+    _save_manifest(manifest, report_dir)
+    return built, failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="캠페인별 HTML/PNG/Excel 리포트를 미리 생성합니다.")
+    parser.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument('--force', action='store_true', help="버전과 상관없이 전체 재생성")
+    parser.add_argument('--base-path', default=BASE_PATH, help="CSV 폴더 경로 (기본값: table/)")
+    parser.add_argument('--report-dir', default=REPORT_DIR, help="리포트 저장 폴더 (기본값: reports/)")
+    parser.add_argument('--versions-only', action='store_true', help="리포트는 만들지 않고 현재 데이터 버전만 갱신")
+    args = parser.parse_args()
+
+    if args.versions_only:
+        # (대시보드가 띄우는 작업: 중복 실행 방지 + 실패 기록 → 같은 데이터로 반복 실행하지 않음)
+        lock = background_jobs.acquire('campaign_versions', args.base_path)
+        if lock is None:
+            print("이미 데이터 버전을 계산하는 중입니다.")
+            raise SystemExit(0)
+        try:
+            status_key = source_key(args.base_path)
+            try:
+                current = update_versions(args.base_path, args.report_dir)
+            except Exception as e:
+                background_jobs.save_status('campaign_versions', status_key, f"{type(e).__name__}: {e}", args.base_path)
+                raise
+            background_jobs.save_status('campaign_versions', status_key, base_path=args.base_path)
+        finally:
+            background_jobs.release(lock)
+        print(f"데이터 버전 갱신 완료: {len(current)}개 캠페인")
+        raise SystemExit(0)
+
+    built_ids, failed_ids = build_reports(args.base_path, args.report_dir, args.workers, args.force)
+    print(f"리포트 생성 완료: {len(built_ids)}개 캠페인 (실패 {len(failed_ids)}개)")
+    for cid, message in failed_ids.items():
+        print(f"  ! {cid}: {message}")
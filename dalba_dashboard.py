@@ -58,6 +58,9 @@ with tab2:
     
     4개의 CSV 파일(`performance`, `campaign`, `product`, `influencer`)을 **모두 `JOIN`**하여 다각도로 성과를 분석합니다.
     
+    > ⚡ **빠른 미리보기:** 데이터가 클 때는 캠페인×플랫폼별 층화 표본(1% → 10%)으로 KPI/차트를 먼저 보여주고(ⓘ에 95% 신뢰구간),
+    > 정확한 값이 계산되면 같은 자리에서 바로 바뀝니다. 계산 중에도 필터를 자유롭게 바꿀 수 있습니다.
+
     #### 📈 핵심 KPI (핵심 성과 지표)
     * `ROAS` (광고비 대비 수익률): **최종 목표**
     * `CTR` (노출 대비 클릭률): 콘텐츠 매력도
@@ -70,6 +73,16 @@ with tab2:
     * `인플루언서 효율성 (Scatter)`: '비용 대비 매출'을 사분면으로 분석 (고효율/저효율 인플루언서 식별)
     * `플랫폼/카테고리별 성과 (Bar/Pie)`: '인스타 vs 유튜브', '세럼 vs 선케어' 성과 비교
     * `성과 랭킹 (Bar)`: '매출 1위 인플루언서', 'ROAS 1위 캠페인' 랭킹
+    * `도달 인플루언서 수 / 성과 분포`: 플랫폼별 중복 제외 인플루언서 수, 인플루언서 규모별 ROAS·CPA 중앙값/상위10% (요약본 기반 추정치, 오차 1~2%, 요약본은 백그라운드에서 갱신)
+
+    #### 📥 캠페인 리포트 다운로드
+    * `campaign_reports.py`가 모든 캠페인의 KPI/차트를 HTML·PNG·Excel로 **미리** 만들어 둡니다. (여러 프로세스로 병렬 생성)
+    * 성과 데이터가 바뀐 캠페인만 다시 만들고, 대시보드에서는 만들어진 파일을 **바로** 내려받습니다.
+
+    #### 🩺 데이터 품질 경고
+    * `data_quality.py`가 FK 관계(성과 → 캠페인/인플루언서, 캠페인 → 제품)와 퍼널 규칙(노출 ≥ 클릭 ≥ 전환, 캠페인 기간 내 포스팅)을 검사합니다.
+    * CSV가 바뀌면 검사는 **백그라운드 프로세스**에서 실행되고, 대시보드는 저장된 리포트만 읽으므로 기다리지 않습니다.
+    * 위반 사항이 있으면 대시보드 상단에 경고로 표시됩니다. (터미널에서 `python data_quality.py --full`로 전체 재검사 가능)
     """)
   
 
@@ -88,6 +101,14 @@ with tab3:
     * **캠페인 '삭제' (Delete):**
         * '기존 캠페인 삭제' 드롭다운에서 삭제할 캠페인을 선택합니다.
         * `pandas`가 CSV 파일 전체를 읽어와, 선택된 행을 '제외'한 나머지를 **파일 전체에 '덮어씁니다'. (`mode='w'`)**
+    * **대량 등록 (Bulk Import):**
+        * 캠페인/제품/인플루언서 CSV·Excel 파일을 업로드하면 필수값, 날짜 순서, 예산(0 초과), `product_id` 존재 여부를 **한 번에(벡터 연산)** 검증합니다.
+        * 오류가 있는 행은 '행 번호 + 사유' 리포트로 보여주고, 나머지 유효한 행만 **한 번에 이어붙인 뒤** 해당 테이블의 캐시만 갱신합니다.
+    * **GenAI 분석 갱신:**
+        * `genai_enrichment.py`가 브랜드 적합도 점수/이유, 코멘트 요약을 **내용이 바뀐 행만** 다시 계산합니다. (결과는 캐시에 저장)
+        * 사용할 GenAI 백엔드는 환경변수 `GENAI_BACKEND`로 지정합니다. (설정이 없으면 버튼이 비활성화됩니다)
+        * 결과는 원본 CSV가 아닌 별도 결과 테이블(`table/genai_*_results.csv`)에 저장되고, 대시보드가 읽을 때 합칩니다.
+        * 백그라운드에서 실행되므로 대시보드는 기다리지 않고, 작업이 끝나면 결과 테이블 변경을 감지해 자동으로 반영됩니다.
     * **[핵심] 즉시 반영 로직:**
         * '추가' 또는 '삭제'가 성공하면, `st.cache_data.clear()` 명령이 실행됩니다.
         * 이는 Streamlit이 '임시 저장(캐시)'해 둔 옛날 CSV 정보를 강제로 '삭제'시킵니다.
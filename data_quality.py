@@ -0,0 +1,395 @@
+"""
+데이터 품질 / 참조 무결성 스캐너
+
+4개 테이블(performance, campaign, product, influencer)의 FK 관계와 퍼널 규칙을
+'행 단위 반복 없이' 벡터 연산(해시 조인 + 범위 비교)으로 한 번에 검사하고,
+대시보드가 읽을 수 있는 JSON 리포트로 저장합니다.
+
+검사 규칙
+    - FK: performance.campaign_id → campaign_master, performance.inf_id → influencer_master,
+          campaign_master.product_id → product_master
+    - PK: 각 테이블 ID 중복
+    - 퍼널: impressions ≥ clicks ≥ conversions, 수치 컬럼 음수 금지
+    - 기간: post_date가 캠페인 기간(start_date ~ end_date) 안에 있는지, 캠페인 종료일 ≥ 시작일
+
+증분 실행
+    성과 테이블은 '이어붙이기(append)'만 되므로, 지난 번에 읽은 파일 위치(byte offset)부터
+    새로 추가된 행만 읽어 검사하고 기존 결과에 합칩니다.
+    perf_id 중복은 지금까지 본 perf_id의 해시(정렬된 uint64 배열)를 따로 저장해 두고 새 행과 비교합니다.
+    (파일을 통째로 교체한 경우에는 inode가 바뀌므로 전체를 다시 검사합니다.)
+    캠페인/인플루언서 마스터가 바뀌면(삭제 등) 예전 행의 FK 결과도 바뀌므로 전체를 다시 검사합니다.
+
+대시보드는 이 스크립트를 백그라운드 프로세스로 띄우고, 저장된 리포트(JSON)만 읽습니다.
+
+사용법
+    python data_quality.py          # 증분 검사
+    python data_quality.py --full   # 전체 재검사
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import background_jobs
+
+# --- [1] 파일 경로 / 설정 ---
+BASE_PATH = "table/"
+TABLE_FILES = {
+    'campaign_performance': 'campaign_performance.csv',
+    'campaign_master': 'campaign_master.csv',
+    'product_master': 'product_master.csv',
+    'influencer_master': 'influencer_master.csv',
+}
+REPORT_FILE = 'data_quality_report.json'
+STATE_FILE = '.data_quality_state.json'
+PERF_IDS_FILE = '.data_quality_perf_ids.npy'  # 지금까지 검사한 perf_id 해시 (증분 PK 중복 검사용)
+SAMPLE_SIZE = 5  # 규칙별로 리포트에 남길 위반 행 ID 개수
+
+# 성과 테이블은 검사에 필요한 컬럼만 읽음 (URL, 코멘트 요약 등 긴 문자열은 제외)
+PERF_COLUMNS = ['perf_id', 'campaign_id', 'inf_id', 'post_date',
+                'actual_cost', 'impressions', 'clicks', 'conversions', 'revenue']
+PERF_DTYPES = {'campaign_id': 'category', 'inf_id': 'category'}  # 키 컬럼은 카테고리 → 해시 조인이 고유값 수만큼만 일어남
+PERF_NUMERIC_COLUMNS = ['actual_cost', 'impressions', 'clicks', 'conversions', 'revenue']
+
+
+# --- [2] 데이터 로드 ---
+def _path(base_path, table):
+    return os.path.join(base_path, TABLE_FILES[table])
+
+def load_masters(base_path=BASE_PATH):
+    """마스터 테이블 3개(캠페인/제품/인플루언서)를 읽어옵니다. (행 수가 적어서 항상 전체 로드)"""
+    df_camp = pd.read_csv(_path(base_path, 'campaign_master'))
+    df_prod = pd.read_csv(_path(base_path, 'product_master'))
+    df_inf = pd.read_csv(_path(base_path, 'influencer_master'))
+    return df_camp, df_prod, df_inf
+
+def read_performance(base_path=BASE_PATH, offset=0):
+    """
+    성과 테이블을 읽습니다. offset(byte)을 주면 그 위치부터 '새로 추가된 행'만 읽습니다.
+    반환값: (DataFrame, 헤더 리스트, 읽기를 마친 파일 위치)
+    """
+    path = _path(base_path, 'campaign_performance')
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline().decode('utf-8').strip().split(',')
+        if offset:
+            f.seek(offset)
+        if f.tell() >= file_size:
+            return pd.DataFrame(columns=PERF_COLUMNS).astype(PERF_DTYPES), header, file_size
+        df_perf = pd.read_csv(
+            f, header=None, names=header, usecols=PERF_COLUMNS, dtype=PERF_DTYPES, encoding='utf-8'
+        )
+        end_offset = f.tell()  # (읽는 도중 새 행이 붙었을 수도 있으니 실제로 읽은 위치를 저장)
+    return df_perf, header, end_offset
+
+def performance_file_id(base_path=BASE_PATH):
+    """
+    성과 파일의 inode 번호. 이어붙이기(append)로는 바뀌지 않고, 파일을 통째로 교체(os.replace)하면 바뀝니다.
+    → 저장해 둔 offset을 그대로 써도 되는지(증분 가능 여부) 판단하는 데 사용
+    """
+    return os.stat(_path(base_path, 'campaign_performance')).st_ino
+
+def tables_mtime(base_path=BASE_PATH):
+    """4개 CSV의 마지막 수정 시각 (대시보드 캐시 키로 사용)"""
+    return tuple(os.path.getmtime(_path(base_path, table)) for table in TABLE_FILES)
+
+
+# --- [3] 검사 규칙 ---
+def _issue(rule, table, severity, description, mask, keys):
+    """위반 마스크 하나를 리포트 항목(dict) 하나로 변환합니다."""
+    mask = np.asarray(mask, dtype=bool)
+    count = int(mask.sum())
+    sample = pd.Series(keys).to_numpy()[mask][:SAMPLE_SIZE].tolist() if count else []
+    return {
+        'rule': rule,
+        'table': table,
+        'severity': severity,
+        'description': description,
+        'count': count,
+        'sample': [str(key) for key in sample],
+    }
+
+def _campaign_window(campaign_ids, df_camp):
+    """
+    성과 행마다 해당 캠페인의 (시작일, 종료일)을 붙입니다.
+    카테고리 코드로 조회하므로 조인 비용은 '캠페인 개수'에만 비례합니다.
+    """
+    campaign_ids = campaign_ids.astype('category')
+    window = df_camp.drop_duplicates('campaign_id').set_index('campaign_id')
+    window = window.reindex(campaign_ids.cat.categories)
+    codes = campaign_ids.cat.codes.to_numpy()  # 결측치는 -1 → 맨 끝에 붙인 NaT를 가리킴
+
+    bounds = []
+    for col in ['start_date', 'end_date']:
+        values = pd.to_datetime(window[col], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        values = np.append(values, np.datetime64('NaT', 'ns'))
+        bounds.append(values[codes])
+    return bounds[0], bounds[1]
+
+def perf_id_hashes(keys):
+    """perf_id → uint64 해시 (읽을 때마다 dtype이 달라도 같은 값이 나오도록 문자열 기준)"""
+    return pd.util.hash_array(keys.astype(str).to_numpy(dtype=object))
+
+def check_performance(df_perf, df_camp, df_inf, known_id_hashes=None):
+    """
+    성과 테이블 규칙 검사 (증분 실행 시에는 새 행에만 적용)
+    known_id_hashes: 이전에 검사한 perf_id 해시 (정렬된 배열) → 새 행의 perf_id가 여기 있으면 중복
+    """
+    table = 'campaign_performance'
+    keys = df_perf['perf_id']
+    issues = []
+
+    # 3-1. FK: 캠페인 / 인플루언서 존재 여부 (해시 조인)
+    issues.append(_issue(
+        'perf_campaign_fk', table, 'error',
+        "campaign_master에 없는 campaign_id (삭제된 캠페인의 성과 데이터)",
+        ~df_perf['campaign_id'].isin(df_camp['campaign_id']), keys
+    ))
+    issues.append(_issue(
+        'perf_influencer_fk', table, 'error',
+        "influencer_master에 없는 inf_id",
+        ~df_perf['inf_id'].isin(df_inf['inf_id']), keys
+    ))
+
+    # 3-2. PK 중복 (새 행끼리 + 이전에 검사한 행과)
+    duplicated = keys.duplicated(keep=False).to_numpy()
+    if known_id_hashes is not None and len(known_id_hashes):
+        hashes = perf_id_hashes(keys)
+        pos = np.searchsorted(known_id_hashes, hashes).clip(max=len(known_id_hashes) - 1)
+        duplicated = duplicated | (known_id_hashes[pos] == hashes)
+    issues.append(_issue(
+        'perf_id_duplicate', table, 'error',
+        "perf_id 중복",
+        duplicated, keys
+    ))
+
+    # 3-3. 퍼널 규칙: 노출 ≥ 클릭 ≥ 전환, 음수 금지
+    numeric = df_perf[PERF_NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    issues.append(_issue(
+        'perf_funnel_order', table, 'error',
+        "impressions ≥ clicks ≥ conversions 위반",
+        (numeric['clicks'] > numeric['impressions']) | (numeric['conversions'] > numeric['clicks']), keys
+    ))
+    issues.append(_issue(
+        'perf_negative_value', table, 'error',
+        "비용/노출/클릭/전환/매출 중 음수 값",
+        (numeric < 0).any(axis=1), keys
+    ))
+
+    # 3-4. 기간 규칙: post_date 형식 + 캠페인 기간 안에 있는지
+    post_date = pd.to_datetime(df_perf['post_date'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    issues.append(_issue(
+        'perf_post_date_invalid', table, 'warning',
+        "post_date가 비어있거나 날짜 형식이 아님",
+        np.isnat(post_date), keys
+    ))
+    start, end = _campaign_window(df_perf['campaign_id'], df_camp)
+    issues.append(_issue(
+        'perf_post_date_out_of_window', table, 'warning',
+        "post_date가 캠페인 기간(start_date ~ end_date) 밖",
+        (post_date < start) | (post_date > end), keys  # (NaT 비교는 항상 False → 위 규칙에서만 잡힘)
+    ))
+    return issues
+
+def check_masters(df_camp, df_prod, df_inf):
+    """마스터 테이블 규칙 검사 (항상 전체 검사)"""
+    issues = []
+
+    issues.append(_issue(
+        'campaign_product_fk', 'campaign_master', 'error',
+        "product_master에 없는 product_id",
+        ~df_camp['product_id'].isin(df_prod['product_id']), df_camp['campaign_id']
+    ))
+
+    start = pd.to_datetime(df_camp['start_date'], errors='coerce')
+    end = pd.to_datetime(df_camp['end_date'], errors='coerce')
+    issues.append(_issue(
+        'campaign_date_invalid', 'campaign_master', 'error',
+        "start_date/end_date가 비어있거나 날짜 형식이 아님",
+        start.isna() | end.isna(), df_camp['campaign_id']
+    ))
+    issues.append(_issue(
+        'campaign_date_order', 'campaign_master', 'error',
+        "종료일이 시작일보다 빠름",
+        end < start, df_camp['campaign_id']
+    ))
+    issues.append(_issue(
+        'campaign_budget_positive', 'campaign_master', 'warning',
+        "total_budget이 0 이하이거나 숫자가 아님",
+        ~(pd.to_numeric(df_camp['total_budget'], errors='coerce') > 0), df_camp['campaign_id']
+    ))
+
+    for table, df, id_col in [('campaign_master', df_camp, 'campaign_id'),
+                              ('product_master', df_prod, 'product_id'),
+                              ('influencer_master', df_inf, 'inf_id')]:
+        issues.append(_issue(
+            f'{id_col}_duplicate', table, 'error',
+            f"{id_col} 중복",
+            df[id_col].duplicated(keep=False), df[id_col]
+        ))
+    return issues
+
+
+# --- [4] 증분 실행 상태 관리 ---
+def _master_fingerprint(df_camp, df_inf):
+    """FK/기간 검사 결과에 영향을 주는 마스터 컬럼의 해시 (바뀌면 성과 테이블 전체 재검사)"""
+    camp_hash = pd.util.hash_pandas_object(df_camp[['campaign_id', 'start_date', 'end_date']], index=False)
+    inf_hash = pd.util.hash_pandas_object(df_inf[['inf_id']], index=False)
+    return f"{int(camp_hash.sum()):x}-{int(inf_hash.sum()):x}-{len(df_camp)}-{len(df_inf)}"
+
+def _load_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _save_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)  # 쓰는 도중에 대시보드가 읽어도 깨진 파일을 보지 않도록
+
+def _load_id_hashes(path, expected_count):
+    """저장된 perf_id 해시 배열 (없거나 상태 파일과 개수가 다르면 None → 전체 재검사)"""
+    try:
+        id_hashes = np.load(path)
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    return id_hashes if len(id_hashes) == expected_count else None
+
+def _save_id_hashes(path, id_hashes):
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, id_hashes)
+    os.replace(path + '.tmp', path)
+
+def _merge_issues(previous, new):
+    """지난 결과 + 새 행 결과를 규칙별로 합칩니다."""
+    merged = {issue['rule']: dict(issue) for issue in previous}
+    for issue in new:
+        if issue['rule'] not in merged:
+            merged[issue['rule']] = dict(issue)
+            continue
+        target = merged[issue['rule']]
+        target['count'] += issue['count']
+        target['sample'] = (target['sample'] + issue['sample'])[:SAMPLE_SIZE]
+    return list(merged.values())
+
+
+# --- [5] 스캔 실행 ---
+def scan(base_path=BASE_PATH, full=False):
+    """
+    전체 규칙을 검사하고 리포트(dict)를 반환합니다. 리포트는 table/data_quality_report.json에도 저장됩니다.
+    (증분 모드에서 perf_id 중복은 '새 행끼리 + 새 행과 이전 행' 사이를 검사하고, 새 행 기준으로 셉니다)
+    """
+    started = datetime.now()
+    source_mtime = tables_mtime(base_path)  # (읽기 전에 기록 → 스캔 도중 파일이 바뀌면 다음 번에 다시 스캔됨)
+    df_camp, df_prod, df_inf = load_masters(base_path)
+    fingerprint = _master_fingerprint(df_camp, df_inf)
+
+    state_path = os.path.join(base_path, STATE_FILE)
+    state = None if full else _load_json(state_path)
+    perf_size = os.path.getsize(_path(base_path, 'campaign_performance'))
+    perf_file_id = performance_file_id(base_path)
+
+    incremental = (
+        state is not None
+        and state.get('fingerprint') == fingerprint
+        and state.get('perf_file_id') == perf_file_id
+        and state.get('perf_offset', 0) <= perf_size
+    )
+    ids_path = os.path.join(base_path, PERF_IDS_FILE)
+    known_id_hashes = _load_id_hashes(ids_path, state.get('perf_id_count')) if incremental else None
+    incremental = incremental and known_id_hashes is not None
+    df_perf, header, perf_offset = read_performance(base_path, state['perf_offset'] if incremental else 0)
+    if incremental and header != state.get('perf_header'):
+        # (헤더가 바뀌었으면 파일이 통째로 다시 써진 것 → 전체 재검사)
+        incremental = False
+        df_perf, header, perf_offset = read_performance(base_path, 0)
+
+    perf_issues = check_performance(df_perf, df_camp, df_inf, known_id_hashes if incremental else None)
+    new_id_hashes = np.sort(perf_id_hashes(df_perf['perf_id']))
+    if incremental:
+        # (두 배열 모두 정렬돼 있으므로 stable 정렬 = 병합만 하면 됨)
+        new_id_hashes = np.sort(np.concatenate([known_id_hashes, new_id_hashes]), kind='stable')
+    perf_rows = len(df_perf)
+    if incremental:
+        perf_issues = _merge_issues(state['perf_issues'], perf_issues)
+        perf_rows += state.get('perf_rows', 0)
+
+    issues = perf_issues + check_masters(df_camp, df_prod, df_inf)
+    violations = [issue for issue in issues if issue['count'] > 0]
+
+    report = {
+        'generated_at': started.isoformat(timespec='seconds'),
+        'mode': 'incremental' if incremental else 'full',
+        'tables_mtime': list(source_mtime),
+        'elapsed_seconds': round((datetime.now() - started).total_seconds(), 3),
+        'rows': {
+            'campaign_performance': perf_rows,
+            'campaign_performance_scanned': len(df_perf),
+            'campaign_master': len(df_camp),
+            'product_master': len(df_prod),
+            'influencer_master': len(df_inf),
+        },
+        'summary': {
+            'ok': not violations,
+            'errors': sum(1 for issue in violations if issue['severity'] == 'error'),
+            'warnings': sum(1 for issue in violations if issue['severity'] == 'warning'),
+        },
+        'issues': violations,
+    }
+
+    _save_json(os.path.join(base_path, REPORT_FILE), report)
+    _save_id_hashes(ids_path, new_id_hashes)
+    _save_json(state_path, {
+        'perf_id_count': len(new_id_hashes),
+        'fingerprint': fingerprint,
+        'perf_header': header,
+        'perf_file_id': perf_file_id,
+        'perf_offset': perf_offset,
+        'perf_rows': perf_rows,
+        'perf_issues': perf_issues,
+    })
+    return report
+
+def load_report(base_path=BASE_PATH):
+    """마지막으로 저장된 리포트를 읽습니다. (없으면 None)"""
+    return _load_json(os.path.join(base_path, REPORT_FILE))
+
+def is_report_stale(report, base_path=BASE_PATH):
+    """리포트가 없거나, 리포트를 만든 뒤 CSV가 바뀌었으면 True"""
+    return report is None or tuple(report.get('tables_mtime', ())) != tables_mtime(base_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="4개 테이블의 참조 무결성 / 데이터 품질을 검사합니다.")
+    parser.add_argument('--full', action='store_true', help="증분 상태를 무시하고 전체 재검사")
+    parser.add_argument('--base-path', default=BASE_PATH, help="CSV 폴더 경로 (기본값: table/)")
+    args = parser.parse_args()
+
+    # (대시보드가 띄운 스캔과 동시에 실행되지 않도록 잠금)
+    lock = background_jobs.acquire('data_quality', args.base_path)
+    if lock is None:
+        print("이미 데이터 품질 스캔이 실행 중입니다.")
+        raise SystemExit(0)
+    try:
+        # (성공/실패를 기록 → 같은 CSV로 실패했으면 대시보드가 스캔을 반복해서 띄우지 않음)
+        status_key = list(tables_mtime(args.base_path))
+        try:
+            result = scan(args.base_path, full=args.full)
+        except Exception as e:
+            background_jobs.save_status('data_quality', status_key, f"{type(e).__name__}: {e}", args.base_path)
+            raise
+        background_jobs.save_status('data_quality', status_key, base_path=args.base_path)
+    finally:
+        background_jobs.release(lock)
+    print(f"[{result['mode']}] {result['rows']['campaign_performance_scanned']:,}행 검사 "
+          f"({result['elapsed_seconds']}초) → 오류 규칙 {result['summary']['errors']}개, "
+          f"경고 규칙 {result['summary']['warnings']}개")
+    for issue in result['issues']:
+        print(f"  - [{issue['severity']}] {issue['table']}.{issue['rule']}: {issue['count']:,}건 "
+              f"{issue['description']} (예: {', '.join(issue['sample'])})")
@@ -0,0 +1,367 @@
+"""
+GenAI 보강(enrichment) 배치 작업
+
+influencer_master의 genai_brand_fit_score / genai_brand_fit_reason,
+campaign_performance의 genai_comment_summary 컬럼을 GenAI 백엔드로 계산합니다.
+
+동작 방식
+    1. 입력 컬럼으로 '내용 해시(content hash)'를 만들고, 같은 내용은 한 번만 요청합니다. (중복 제거)
+    2. 해시 → 결과를 SQLite 캐시(table/.genai_cache.sqlite)에 영구 저장합니다.
+       → 다음 실행에서는 '내용이 바뀐' 인플루언서/포스트만 다시 요청합니다.
+    3. 요청은 batch_size개씩 묶고, 워커 concurrency개가 크기 제한 큐에서 배치를 꺼내 보냅니다. (동시 요청 수 제한)
+    4. 결과는 원본 CSV가 아니라 ID 기준 '결과 테이블'(table/genai_*_results.csv)에 따로 저장하고,
+       대시보드가 데이터를 읽을 때 합칩니다. (apply_results)
+       → 관리자 페이지가 원본에 이어붙이는 행과 충돌하지 않고, 원본 파일도 교체되지 않습니다.
+
+백엔드 설정
+    ScoringBackend를 상속한 클래스를 만들고 환경변수 GENAI_BACKEND="패키지.모듈:클래스명"으로 지정합니다.
+    (관리자 페이지의 'GenAI 분석 갱신' 버튼은 이 설정이 있을 때만 동작합니다)
+    'stub'은 네트워크 없이 내용 해시로 가짜 값을 만드는 테스트용 모델이라, 터미널에서 --backend stub으로
+    직접 지정할 때만 사용할 수 있습니다. (실제 데이터를 가짜 값으로 덮어쓰지 않도록)
+
+사용법
+    python genai_enrichment.py                          # GENAI_BACKEND 백엔드, 변경분만 갱신
+    python genai_enrichment.py --only influencers       # 인플루언서만
+    python genai_enrichment.py --backend my_llm:LLMBackend --concurrency 8 --batch-size 32
+    python genai_enrichment.py --backend stub --base-path /tmp/table_copy/   # 테스트용
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+import background_jobs
+
+# --- [1] 파일 경로 / 설정 ---
+BASE_PATH = "table/"
+INFLUENCER_MASTER_FILE = 'influencer_master.csv'
+PERFORMANCE_FILE = 'campaign_performance.csv'
+CACHE_FILE = '.genai_cache.sqlite'
+BACKEND_ENV = 'GENAI_BACKEND'  # 운영 백엔드 설정 ('패키지.모듈:클래스명')
+PROMPT_VERSION = 'v1'  # 프롬프트/채점 기준을 바꾸면 올려서 전체 재계산
+RECORD_CHUNK = 10_000  # 요청할 행을 레코드(dict)로 바꿀 때 한 번에 변환하는 행 수
+
+# 작업 종류별: 어떤 파일의 어떤 컬럼을 입력으로 써서 어떤 컬럼을 채우는지
+ENRICHMENT_TASKS = {
+    'influencers': {
+        'file': INFLUENCER_MASTER_FILE,
+        'id_col': 'inf_id',
+        'input_columns': ['inf_name', 'platform', 'main_category', 'follower_count', 'avg_engagement_rate'],
+        'output_columns': ['genai_brand_fit_score', 'genai_brand_fit_reason'],
+        'method': 'score_influencers',
+        'results_file': 'genai_influencer_results.csv',
+    },
+    'posts': {
+        'file': PERFORMANCE_FILE,
+        'id_col': 'perf_id',
+        'input_columns': ['post_url'],
+        'output_columns': ['genai_comment_summary'],
+        'method': 'summarize_comments',
+        'results_file': 'genai_post_results.csv',
+    },
+}
+
+
+# --- [2] 스코어링 백엔드 ---
+class ScoringBackend:
+    """
+    GenAI 백엔드 인터페이스.
+    각 메서드는 입력 레코드(dict) 리스트를 받아서, 같은 순서의 결과(dict) 리스트를 반환합니다.
+    """
+    name = 'base'
+
+    async def score_influencers(self, records):
+        """→ [{'genai_brand_fit_score': float(1~5), 'genai_brand_fit_reason': str}, ...]"""
+        raise NotImplementedError
+
+    async def summarize_comments(self, records):
+        """→ [{'genai_comment_summary': str}, ...]"""
+        raise NotImplementedError
+
+
+class StubBackend(ScoringBackend):
+    """테스트용 로컬 모델: 입력 내용의 해시로 '항상 같은' 점수/문장을 만듭니다. (네트워크 호출 없음)"""
+    name = 'stub'
+    IMAGE_WORDS = ['고급진', '영한', '전문적인', '클린한']
+
+    def __init__(self, delay=0.0):
+        self.delay = delay  # 실제 API 지연을 흉내내고 싶을 때 (초)
+
+    @staticmethod
+    def _seed(record):
+        text = json.dumps(record, ensure_ascii=False, sort_keys=True, default=str)
+        return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:8], 16)
+
+    async def score_influencers(self, records):
+        await asyncio.sleep(self.delay)
+        results = []
+        for record in records:
+            seed = self._seed(record)
+            results.append({
+                'genai_brand_fit_score': round(1.0 + (seed % 41) / 10, 1),
+                'genai_brand_fit_reason': f"{self.IMAGE_WORDS[seed % len(self.IMAGE_WORDS)]} 이미지.",
+            })
+        return results
+
+    async def summarize_comments(self, records):
+        await asyncio.sleep(self.delay)
+        return [{'genai_comment_summary': f"긍정 {60 + self._seed(record) % 40}%."} for record in records]
+
+
+BACKENDS = {'stub': StubBackend}
+
+def configured_backend():
+    """환경변수에 설정된 운영 백엔드 ('패키지.모듈:클래스명'). 없거나 테스트용 백엔드(stub)면 None"""
+    spec = os.environ.get(BACKEND_ENV, '').strip()
+    return spec if spec and spec not in BACKENDS else None
+
+def load_backend(spec):
+    """'stub' 또는 '패키지.모듈:클래스명' 형식으로 백엔드 인스턴스를 만듭니다."""
+    if spec in BACKENDS:
+        return BACKENDS[spec]()
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f"백엔드 형식이 올바르지 않습니다: '{spec}' (예: my_llm:LLMBackend)")
+    backend = getattr(importlib.import_module(module_name), class_name)()
+    # (isinstance 검사는 하지 않음: 이 파일을 스크립트로 실행하면 __main__.ScoringBackend와
+    #  플러그인이 상속한 genai_enrichment.ScoringBackend가 서로 다른 클래스가 되기 때문)
+    missing = [task['method'] for task in ENRICHMENT_TASKS.values() if not callable(getattr(backend, task['method'], None))]
+    if missing:
+        raise TypeError(f"'{spec}'에 필요한 메서드가 없습니다: {', '.join(missing)}")
+    return backend
+
+
+# --- [3] 내용 해시 + 영구 캐시 ---
+def content_hashes(df, input_columns, task_key, backend_name):
+    """입력 컬럼 값을 이어붙여 행마다 sha256 해시를 만듭니다. (작업/백엔드/프롬프트 버전도 포함)"""
+    prefix = f"{task_key}\x1f{backend_name}\x1f{PROMPT_VERSION}\x1f"
+    joined = df[input_columns].astype(str).agg('\x1f'.join, axis=1)
+    return joined.map(lambda text: hashlib.sha256((prefix + text).encode('utf-8')).hexdigest())
+
+
+class ResultCache:
+    """content_hash → 결과(JSON)를 저장하는 SQLite 캐시"""
+    QUERY_CHUNK = 900  # SQLite 바인딩 변수 개수 제한
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS genai_cache (content_hash TEXT PRIMARY KEY, result TEXT NOT NULL)")
+
+    def get_many(self, hashes):
+        found = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), self.QUERY_CHUNK):
+            chunk = hashes[i:i + self.QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT content_hash, result FROM genai_cache WHERE content_hash IN ({placeholders})", chunk
+            )
+            found.update((content_hash, json.loads(result)) for content_hash, result in rows)
+        return found
+
+    def put_many(self, items):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO genai_cache (content_hash, result) VALUES (?, ?)",
+            [(content_hash, json.dumps(result, ensure_ascii=False)) for content_hash, result in items]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# --- [4] 배치 + 동시성 제한 실행 ---
+async def run_batches(backend_method, records, concurrency, batch_size, on_results):
+    """
+    (hash, 레코드) 쌍을 batch_size개씩 묶어서, 워커 concurrency개가 큐에서 하나씩 꺼내 백엔드로 보냅니다.
+    큐 크기를 제한하므로 배치를 미리 전부 만들어 두지 않습니다. (입력이 많아도 메모리 일정)
+    배치가 끝날 때마다 on_results(hash-결과 쌍)를 호출해 바로 캐시에 저장합니다. (중간에 죽어도 진행분 보존)
+    결과 개수가 요청 개수와 다르면 어느 결과가 어느 레코드 것인지 알 수 없으므로 배치 전체를 실패로 처리합니다.
+    반환값: 실패한 배치 수
+    """
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            try:
+                results = await backend_method([record for _, record in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"결과 개수 불일치 (요청 {len(batch)}건, 응답 {len(results)}건)")
+                on_results([(content_hash, result) for (content_hash, _), result in zip(batch, results)])
+            except Exception as e:
+                failed += 1
+                print(f"  ! 배치 실패 ({len(batch)}건): {e}")
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) == batch_size:
+            await queue.put(batch)
+            batch = []
+    if batch:
+        await queue.put(batch)
+    for _ in workers:
+        await queue.put(None)  # (워커 종료 신호)
+    await asyncio.gather(*workers)
+    return failed
+
+
+# --- [5] 결과 저장 (ID 기준 결과 테이블) + 읽을 때 합치기 ---
+def write_results(path, id_col, output_columns, results_by_id, current_ids):
+    """
+    새 결과를 기존 결과 테이블('ID + 결과 컬럼')에 합쳐서 저장합니다. (원본 CSV는 건드리지 않음)
+        - 이번에 결과가 없는 ID(배치 실패 등)는 이전 결과를 그대로 유지
+        - 원본 CSV에서 사라진 ID(current_ids에 없음)는 제거
+    ID는 원본 CSV와 같은 dtype으로 읽습니다. (예: inf_id는 문자열, perf_id는 정수)
+    임시 파일 → os.replace로 교체하므로, 대시보드는 쓰는 도중에도 이전 결과를 그대로 읽습니다.
+    반환값: 이전 결과와 비교해 값이 바뀌었거나 새로 생긴 행 수
+    """
+    id_dtype = current_ids.dtype
+    df_new = pd.DataFrame.from_dict(results_by_id, orient='index').reindex(columns=output_columns)
+    df_new.index = df_new.index.astype(id_dtype)
+
+    if os.path.exists(path):
+        df_old = pd.read_csv(path, dtype={id_col: id_dtype}).set_index(id_col)[output_columns]
+    else:
+        df_old = pd.DataFrame(columns=output_columns, index=pd.Index([], dtype=id_dtype))
+
+    df_out = pd.concat([df_old[~df_old.index.isin(df_new.index)], df_new])
+    df_out = df_out[df_out.index.isin(current_ids)].rename_axis(id_col)
+
+    changed = (df_out.astype(str) != df_old.reindex(df_out.index).astype(str)).any(axis=1)
+    if not changed.any() and len(df_out) == len(df_old):
+        return 0  # (그대로면 파일을 다시 쓰지 않음 → 대시보드 캐시도 유지)
+
+    tmp_path = path + '.tmp'
+    df_out.reset_index().to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, path)
+    return int(changed.sum())
+
+def apply_results(df, task_key, base_path=BASE_PATH):
+    """
+    결과 테이블의 값을 df의 결과 컬럼에 덮어씁니다. (결과가 없는 행은 원래 값 유지)
+    대시보드/리포트가 CSV를 읽은 직후에 호출합니다. df를 직접 수정해서 반환합니다.
+    """
+    task = ENRICHMENT_TASKS[task_key]
+    id_col = task['id_col']
+    path = os.path.join(base_path, task['results_file'])
+    if id_col not in df.columns or not os.path.exists(path):
+        return df
+
+    df_results = pd.read_csv(path, dtype={id_col: df[id_col].dtype}).set_index(id_col)
+    for col in task['output_columns']:
+        mapped = df[id_col].map(df_results[col])
+        df[col] = mapped.fillna(df[col]) if col in df.columns else mapped
+    return df
+
+def results_mtime(base_path=BASE_PATH):
+    """결과 테이블들의 마지막 수정 시각 (없으면 0, 대시보드 캐시 키로 사용)"""
+    paths = [os.path.join(base_path, task['results_file']) for task in ENRICHMENT_TASKS.values()]
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else 0 for path in paths)
+
+
+def enrich(task_key, backend, base_path=BASE_PATH, concurrency=4, batch_size=32, force=False):
+    """
+    작업 하나(influencers / posts)를 실행합니다.
+    force=True면 캐시를 무시하고 전부 다시 요청합니다.
+    """
+    task = ENRICHMENT_TASKS[task_key]
+    path = os.path.join(base_path, task['file'])
+    df = pd.read_csv(path, usecols=[task['id_col']] + task['input_columns'])
+
+    # 5-1. 내용 해시 + 중복 제거
+    df['content_hash'] = content_hashes(df, task['input_columns'], task_key, backend.name)
+    df_unique = df.drop_duplicates('content_hash')
+
+    cache = ResultCache(os.path.join(base_path, CACHE_FILE))
+    try:
+        # 5-2. 캐시에 없는(= 새로 생겼거나 내용이 바뀐) 것만 요청
+        cached = {} if force else cache.get_many(df_unique['content_hash'])
+        df_todo = df_unique[~df_unique['content_hash'].isin(cached.keys())]
+        # (레코드 dict는 배치를 보낼 때마다 필요한 만큼만 만듦)
+        records = (
+            (content_hash, record)
+            for start in range(0, len(df_todo), RECORD_CHUNK)
+            for content_hash, record in zip(
+                df_todo['content_hash'].iloc[start:start + RECORD_CHUNK],
+                df_todo[task['input_columns']].iloc[start:start + RECORD_CHUNK].to_dict(orient='records')
+            )
+        )
+
+        new_results = {}
+        def on_results(items):
+            cache.put_many(items)
+            new_results.update(items)
+
+        failed = 0
+        if not df_todo.empty:
+            failed = asyncio.run(run_batches(
+                getattr(backend, task['method']), records, concurrency, batch_size, on_results
+            ))
+    finally:
+        cache.close()
+
+    # 5-3. 결과를 ID 기준으로 펼쳐서 결과 테이블에 저장
+    all_results = {**cached, **new_results}
+    results_by_id = {
+        row_id: all_results[content_hash]
+        for row_id, content_hash in zip(df[task['id_col']], df['content_hash'])
+        if content_hash in all_results
+    }
+    updated = write_results(
+        os.path.join(base_path, task['results_file']), task['id_col'], task['output_columns'],
+        results_by_id, df[task['id_col']]
+    )
+
+    return {
+        'task': task_key,
+        'rows': len(df),
+        'unique_inputs': len(df_unique),
+        'cache_hits': len(df_unique) - len(df_todo),
+        'requested': len(df_todo),
+        'failed_batches': failed,
+        'rows_updated': updated,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="GenAI 컬럼(브랜드 적합도, 코멘트 요약)을 배치로 계산합니다.")
+    parser.add_argument('--backend', default=None,
+                        help=f"'패키지.모듈:클래스명' (기본값: 환경변수 {BACKEND_ENV}) / 테스트용은 'stub'")
+    parser.add_argument('--only', choices=list(ENRICHMENT_TASKS.keys()), help="하나의 작업만 실행")
+    parser.add_argument('--concurrency', type=int, default=4, help="동시에 보낼 최대 배치 수")
+    parser.add_argument('--batch-size', type=int, default=32, help="한 번에 보낼 레코드 수")
+    parser.add_argument('--force', action='store_true', help="캐시를 무시하고 전부 다시 계산")
+    parser.add_argument('--base-path', default=BASE_PATH, help="CSV 폴더 경로 (기본값: table/)")
+    args = parser.parse_args()
+
+    backend_spec = args.backend or configured_backend()
+    if backend_spec is None:
+        parser.error(f"GenAI 백엔드가 설정되지 않았습니다. 환경변수 {BACKEND_ENV}에 '패키지.모듈:클래스명'을 "
+                     "지정하거나 --backend로 지정해주세요. (테스트용 가짜 값: --backend stub)")
+
+    # (관리자 페이지에서 띄운 작업과 동시에 실행되지 않도록 잠금)
+    lock = background_jobs.acquire('genai_enrichment', args.base_path)
+    if lock is None:
+        print("이미 GenAI 분석이 실행 중입니다.")
+        raise SystemExit(0)
+    try:
+        scoring_backend = load_backend(backend_spec)
+        for key in ([args.only] if args.only else ENRICHMENT_TASKS.keys()):
+            stats = enrich(key, scoring_backend, args.base_path, args.concurrency, args.batch_size, args.force)
+            print(f"[{stats['task']}] {stats['rows']:,}행 / 고유 입력 {stats['unique_inputs']:,}건 → "
+                  f"캐시 사용 {stats['cache_hits']:,}건, 신규 요청 {stats['requested']:,}건 "
+                  f"(실패 배치 {stats['failed_batches']}), 결과 갱신 {stats['rows_updated']:,}행", flush=True)
+    finally:
+        background_jobs.release(lock)
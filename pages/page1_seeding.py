@@ -1,13 +1,20 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import os
+import genai_enrichment
 
 # --- [1] 데이터 로드 (CSV 파일 연동!) ---
+INFLUENCER_FILE = 'table/influencer_master.csv'
+
 @st.cache_data # 데이터를 캐시에 저장해서 매번 로드하지 않게 함
-def load_influencer_data():
-    file_path = 'table/influencer_master.csv'
+def load_influencer_data(file_mtime=None):
+    # (file_mtime: 파일이 바뀌면 캐시 키가 달라져서 다시 읽음 → 관리자 페이지에서 등록/수정한 내용, GenAI 결과가 자동 반영)
+    file_path = INFLUENCER_FILE
     try:
         df = pd.read_csv(file_path)
+        # (GenAI 브랜드 적합도는 별도 결과 테이블에 저장됨 → 읽을 때 합치기)
+        df = genai_enrichment.apply_results(df, 'influencers')
         return df
     except FileNotFoundError:
         # [!] 에러 메시지도 새 경로로 업데이트
@@ -18,7 +25,9 @@ def load_influencer_data():
         return pd.DataFrame()
 
 # 데이터 로드
-df = load_influencer_data()
+df = load_influencer_data(
+    (os.path.getmtime(INFLUENCER_FILE), genai_enrichment.results_mtime()) if os.path.exists(INFLUENCER_FILE) else None
+)
 
 # 데이터 로드에 실패하면 실행 중단
 if df.empty:
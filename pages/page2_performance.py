@@ -2,16 +2,31 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import data_quality
+import genai_enrichment
+import background_jobs
+import campaign_reports
+import perf_sketches
+import approx_kpis
+import os
+import functools
+
+PROGRESSIVE_MIN_ROWS = 200_000  # 성과 데이터가 이 이상이면 '빠른 미리보기'를 기본으로 켬
 
 # --- [1] 모든 CSV 데이터 로드 (v1과 동일) ---
+# (tables_mtime: CSV가 바뀌면 캐시 키가 달라져서 다시 읽음 → 관리자 수정/GenAI 보강 결과가 자동 반영)
 @st.cache_data
-def load_all_data():
+def load_all_data(tables_mtime=None):
     try:
         base_path = 'table/'
         df_perf = pd.read_csv(base_path + 'campaign_performance.csv')
         df_camp = pd.read_csv(base_path + 'campaign_master.csv')
         df_prod = pd.read_csv(base_path + 'product_master.csv')
         df_inf = pd.read_csv(base_path + 'influencer_master.csv')
+
+        # (GenAI 결과는 별도 결과 테이블에 저장됨 → 읽을 때 합치기)
+        df_perf = genai_enrichment.apply_results(df_perf, 'posts', base_path)
+        df_inf = genai_enrichment.apply_results(df_inf, 'influencers', base_path)
         return df_perf, df_camp, df_prod, df_inf
     except FileNotFoundError as e:
         st.error(f"😭 데이터 파일({e.filename})을 찾을 수 없습니다! 'table' 폴더에 모든 CSV가 있는지 확인해주세요.")
@@ -20,25 +35,71 @@ def load_all_data():
         st.error(f"파일 로드 중 오류 발생: {e}")
         return None, None, None, None
 
-df_perf, df_camp, df_prod, df_inf = load_all_data()
+try:
+    data_version = data_quality.tables_mtime() + genai_enrichment.results_mtime()
+except OSError:
+    data_version = None  # (파일이 없으면 load_all_data에서 에러 메시지를 보여줌)
+
+df_perf, df_camp, df_prod, df_inf = load_all_data(data_version)
 
 if any(df is None for df in [df_perf, df_camp, df_prod, df_inf]):
     st.stop()
 
+# [v3 신규] 데이터 품질 리포트
+# (스캔은 별도 프로세스(data_quality.py)에서 실행 → 페이지는 저장된 JSON 리포트만 읽어서 기다리지 않음)
 st.title("📊 성과 분석 대시보드 (v2)")
 st.markdown("캠페인별, 인플루언서별 성과를 다각도로 분석합니다.")
 
-# --- [2] 데이터 전처리: JOIN 및 타입 변환 (v1보다 개선) ---
 try:
+    quality_report = data_quality.load_report()
+    if data_quality.is_report_stale(quality_report):
+        scan_failure = background_jobs.failed_for('data_quality', list(data_quality.tables_mtime()))
+        if scan_failure:
+            # (같은 CSV로 이미 실패했으면 다시 띄우지 않음 → CSV를 고치면 수정 시각이 바뀌어서 다시 시도)
+            st.error(f"❌ 데이터 품질 스캔 실패 ({scan_failure['finished_at']}): {scan_failure['error']}")
+            with st.expander("📜 스캔 로그 (마지막 20줄)"):
+                st.code(background_jobs.log_tail('data_quality') or "(로그 없음)")
+        else:
+            # (CSV가 바뀌었으면 백그라운드 스캔 시작 / 이미 실행 중이면 그대로 둠 → 모든 세션에서 중복 실행 방지)
+            background_jobs.launch('data_quality.py', 'data_quality')
+            st.caption("⏳ 데이터 품질 스캔이 백그라운드에서 실행 중입니다. (새로고침하면 최신 결과가 반영됩니다)")
+
+    if quality_report is not None and not quality_report['summary']['ok']:
+        with st.expander(
+            f"⚠️ 데이터 품질 경고: 오류 규칙 {quality_report['summary']['errors']}개, "
+            f"경고 규칙 {quality_report['summary']['warnings']}개 (클릭해서 확인)"
+        ):
+            st.caption(f"검사 시각: {quality_report['generated_at']} / 삭제된 캠페인·인플루언서의 성과 데이터 등 마스터와 연결되지 않는 행은 아래 분석에서 제외됩니다.")
+            st.dataframe(
+                pd.DataFrame(quality_report['issues'])[['severity', 'table', 'description', 'count', 'sample']],
+                use_container_width=True
+            )
+except Exception as e:
+    st.caption(f"데이터 품질 리포트를 불러오지 못했습니다: {e}")
+
+# --- [2] 데이터 전처리: JOIN 및 타입 변환 (v1보다 개선) ---
+# [v3] JOIN 결과는 CSV가 바뀔 때만 다시 만듦 (읽기 전용으로만 쓰므로 복사 없이 같은 객체를 재사용)
+@st.cache_resource(max_entries=1)
+def merge_all_data(tables_mtime, _df_perf, _df_camp, _df_prod, _df_inf):
     # 2-1. 모든 테이블 JOIN
-    df_merged = pd.merge(df_perf, df_camp, on='campaign_id', how='left')
-    df_merged = pd.merge(df_merged, df_prod, on='product_id', how='left')
-    df_merged = pd.merge(df_merged, df_inf, on='inf_id', how='left', suffixes=('_perf', '_inf')) # 컬럼명 중복 방지
+    df_merged = pd.merge(_df_perf, _df_camp, on='campaign_id', how='left')
+    df_merged = pd.merge(df_merged, _df_prod, on='product_id', how='left')
+    df_merged = pd.merge(df_merged, _df_inf, on='inf_id', how='left', suffixes=('_perf', '_inf')) # 컬럼명 중복 방지
 
     # 2-2. [v2 신규] 날짜 데이터 변환 (시계열 분석용)
     # (errors='coerce'는 잘못된 날짜 형식이면 NaT(결측치)로 만듦)
     df_merged['post_date'] = pd.to_datetime(df_merged['post_date'], errors='coerce')
 
+    # 2-3. [v3 신규] 빠른 미리보기용 표본 키 (행별 고정 난수 + 캠페인×플랫폼 층 크기)
+    return approx_kpis.add_sampling_keys(df_merged)
+
+@st.cache_resource(max_entries=1)
+def build_sample_levels(tables_mtime, _df_merged):
+    """미리보기 단계별 층화 표본 (1% ⊂ 10%)"""
+    return {fraction: approx_kpis.draw_sample(_df_merged, fraction) for fraction in approx_kpis.SAMPLE_FRACTIONS}
+
+try:
+    df_merged = merge_all_data(data_version, df_perf, df_camp, df_prod, df_inf)
 except Exception as e:
     st.error(f"데이터 병합(JOIN) 또는 날짜 변환 중 오류 발생: {e}")
     st.stop()
@@ -81,195 +142,357 @@ else:
         max_value=max_date
     )
 
+# 3-4. [v3 신규] 빠른 미리보기 모드 (데이터가 클 때 기본으로 켜짐)
+st.sidebar.divider()
+progressive_mode = st.sidebar.toggle(
+    "⚡ 빠른 미리보기 (표본 → 정확값)",
+    value=len(df_merged) >= PROGRESSIVE_MIN_ROWS,
+    help="캠페인×플랫폼별 층화 표본으로 KPI와 차트를 먼저 보여주고, 정확한 값이 계산되면 같은 자리에서 바뀝니다."
+)
+
 # --- [4] 필터링된 데이터로 분석 ---
 if not selected_campaign_ids or not selected_products:
     st.warning("사이드바에서 하나 이상의 캠페인과 제품을 선택해주세요.")
     st.stop()
 
-# 메인 데이터 필터링
-filtered_data = df_merged[
-    (df_merged['campaign_id'].isin(selected_campaign_ids)) &
-    (df_merged['product_name'].isin(selected_products))
-]
-
-# [v2 신규] 날짜 필터링 적용
-if selected_date_range[0] and selected_date_range[1]:
-    start_date = pd.to_datetime(selected_date_range[0])
-    end_date = pd.to_datetime(selected_date_range[1])
-    filtered_data = filtered_data[
-        (filtered_data['post_date'] >= start_date) &
-        (filtered_data['post_date'] <= end_date)
-    ]
+def apply_filters(df):
+    """사이드바 필터(캠페인/제품/날짜)를 적용합니다. (표본과 전체 데이터에 똑같이 사용)"""
+    # 메인 데이터 필터링
+    mask = (df['campaign_id'].isin(selected_campaign_ids)) & (df['product_name'].isin(selected_products))
+    mask &= df['inf_name'].notna()  # (인플루언서 마스터에 없는 inf_id 행 = 연결 끊긴 행은 집계에서 제외)
+
+    # [v2 신규] 날짜 필터링 적용
+    if selected_date_range[0] and selected_date_range[1]:
+        start_date = pd.to_datetime(selected_date_range[0])
+        end_date = pd.to_datetime(selected_date_range[1])
+        mask &= (df['post_date'] >= start_date) & (df['post_date'] <= end_date)
+
+    return df[mask]
+
+def render_kpis_and_charts(filtered_data, kpis, stage):
+    """
+    KPI와 차트를 그립니다. (빠른 미리보기 단계마다 같은 자리에 다시 그려짐)
+    filtered_data: 정확값 단계는 필터링된 원본, 미리보기 단계는 가중치(1/π)를 곱한 표본
+    kpis: approx_kpis.estimate_kpis() 결과 {지표: (값, 하한, 상한)}
+    """
+    st.divider()
+
+    # --- [5] 핵심 성과 지표 (KPI) 표시 (v2 대폭 수정) ---
+    st.subheader(f"📈 총괄 성과 요약 (선택된 필터 기준)")
+
+    # 5-1. KPI 표시 형식 (0으로 나누기 방지는 estimate_kpis에서 처리)
+    won = lambda v: f"{v:,.0f} 원"
+    won_1 = lambda v: f"{v:,.1f} 원"
+    pct = lambda v: f"{v:.2%}"
+
+    def show_metric(col, label, key, fmt):
+        value, low, high = kpis[key]
+        # [v3 신규] 미리보기 단계에서는 ⓘ에 95% 신뢰구간 표시
+        ci_help = None if stage == 'exact' else f"95% 신뢰구간: {fmt(low)} ~ {fmt(high)}"
+        col.metric(label, fmt(value), help=ci_help)
+
+    # 5-2. 3x2 그리드로 KPI 표시
+    kpi_cols = st.columns(3)
+    show_metric(kpi_cols[0], "💰 총 매출 (Revenue)", 'revenue', won)
+    show_metric(kpi_cols[1], "💸 총 비용 (Cost)", 'cost', won)
+    show_metric(kpi_cols[2], "📈 총 ROAS", 'roas', pct)
+
+    kpi_cols = st.columns(3)
+    show_metric(kpi_cols[0], "🖱️ 클릭 대비 전환율 (CVR)", 'cvr', pct)
+    show_metric(kpi_cols[1], "🎯 노출 대비 클릭률 (CTR)", 'ctr', pct)
+    show_metric(kpi_cols[2], "🛍️ 평균 객단가 (AOV)", 'aov', won)
+
+    kpi_cols = st.columns(3)
+    show_metric(kpi_cols[0], "🫰 클릭당 비용 (CPC)", 'cpc', won_1)
+    show_metric(kpi_cols[1], "🫰 전환당 비용 (CPA)", 'cpa', won_1)
+
+
+    # --- [6] 시각화 (Charts) (v2 대폭 수정) ---
+    st.divider()
+    st.subheader("📊 상세 분석 차트")
+
+    # 6-1. [v2 신규] 날짜별 매출 추이 (Line Chart)
+    st.markdown("#### 1. 날짜별 매출 추이")
+    time_series_data = filtered_data.groupby(filtered_data['post_date'].dt.date)['revenue'].sum().reset_index()
+    time_series_data = time_series_data.rename(columns={'post_date': '날짜', 'revenue': '매출액'})
+
+    if time_series_data.empty:
+        st.info("시계열 차트를 그릴 날짜 데이터가 부족합니다.")
+    else:
+        fig_time = px.line(
+            time_series_data, 
+            x='날짜', 
+            y='매출액', 
+            title='날짜별 매출 발생 추이',
+            markers=True,
+            template='plotly_white'
+        )
+        st.plotly_chart(fig_time, use_container_width=True, key=f"fig_time_{stage}")
+
+
+    # 6-2. [v2 신규] 비용-매출 효율성 분석 (Scatter Plot)
+    st.markdown("#### 2. 인플루언서 효율성 분석 (비용 vs 매출)")
+    inf_perf_agg = filtered_data.groupby('inf_name').agg(
+        total_cost=('actual_cost', 'sum'),
+        total_revenue=('revenue', 'sum'),
+        platform=('platform', 'first') # 플랫폼별로 색상 구분
+    ).reset_index()
+
+    fig_scatter = px.scatter(
+        inf_perf_agg,
+        x='total_cost',
+        y='total_revenue',
+        color='platform', # 플랫폼별로 색상 구분
+        hover_name='inf_name', # 마우스 올리면 이름 표시
+        title='인플루언서별 비용 vs 매출 (효율성 사분면)',
+        labels={'total_cost': '총 집행 비용 (원)', 'total_revenue': '총 발생 매출 (원)'},
+        template='plotly_white'
+    )
+    fig_scatter.add_hline(y=inf_perf_agg['total_revenue'].mean(), line_dash="dot", annotation_text="평균 매출")
+    fig_scatter.add_vline(x=inf_perf_agg['total_cost'].mean(), line_dash="dot", annotation_text="평균 비용")
+    st.plotly_chart(fig_scatter, use_container_width=True, key=f"fig_scatter_{stage}")
+
+
+    # 6-3. [v2 신규] 플랫폼별 / 카테고리별 성과 (Bar/Pie Charts)
+    st.markdown("#### 3. 플랫폼 및 카테고리별 성과 분석")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # 플랫폼별 ROAS (Bar Chart)
+        platform_perf = filtered_data.groupby('platform').agg(
+            revenue=('revenue', 'sum'),
+            actual_cost=('actual_cost', 'sum')
+        ).reset_index()
+        platform_perf['ROAS'] = (platform_perf['revenue'] / platform_perf['actual_cost']).fillna(0)
+        platform_perf = platform_perf.sort_values(by='ROAS', ascending=False)
+
+        fig_platform = px.bar(
+            platform_perf,
+            x='platform',
+            y='ROAS',
+            title='플랫폼별 ROAS',
+            labels={'platform': '플랫폼', 'ROAS': 'ROAS'},
+            template='plotly_white',
+            color='platform'
+        )
+        fig_platform.update_yaxes(tickformat=".1%")
+        st.plotly_chart(fig_platform, use_container_width=True, key=f"fig_platform_{stage}")
+
+    with col2:
+        # 제품 카테고리별 매출 비중 (Pie Chart)
+        category_perf = filtered_data.groupby('category').agg(
+            revenue=('revenue', 'sum')
+        ).reset_index()
+
+        fig_category = px.pie(
+            category_perf,
+            names='category',
+            values='revenue',
+            title='제품 카테고리별 매출 비중',
+            hole=0.3, # 도넛 차트
+            template='plotly_white'
+        )
+        st.plotly_chart(fig_category, use_container_width=True, key=f"fig_category_{stage}")
+
+
+    # 6-4. 기존 차트 (인플루언서/캠페인별 랭킹)
+    st.markdown("#### 4. 성과 랭킹 (Top 10)")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # 인플루언서별 매출 랭킹 (v1과 동일)
+        inf_performance = filtered_data.groupby('inf_name').agg(
+            revenue=('revenue', 'sum'),
+            actual_cost=('actual_cost', 'sum')
+        ).reset_index()
+        inf_performance = inf_performance.sort_values(by='revenue', ascending=False)
+
+        fig_inf = px.bar(
+            inf_performance.head(10),
+            x='inf_name', y='revenue',
+            title='인플루언서별 발생 매출 (Top 10)',
+            labels={'inf_name': '인플루언서', 'revenue': '발생 매출'},
+            template='plotly_white'
+        )
+        st.plotly_chart(fig_inf, use_container_width=True, key=f"fig_inf_{stage}")
+
+    with col2:
+        # 캠페인별 ROAS 랭킹 (v1과 동일)
+        camp_performance = filtered_data.groupby('campaign_name').agg(
+            revenue=('revenue', 'sum'),
+            actual_cost=('actual_cost', 'sum')
+        ).reset_index()
+        camp_performance['ROAS'] = (camp_performance['revenue'] / camp_performance['actual_cost']).fillna(0)
+        camp_performance = camp_performance.sort_values(by='ROAS', ascending=False)
+
+        fig_camp = px.bar(
+            camp_performance.head(10),
+            x='campaign_name', y='ROAS',
+            title='캠페인별 ROAS (Top 10)',
+            labels={'campaign_name': '캠페인', 'ROAS': 'ROAS'},
+            template='plotly_white'
+        )
+        fig_camp.update_yaxes(tickformat=".1%")
+        st.plotly_chart(fig_camp, use_container_width=True, key=f"fig_camp_{stage}")
+
+
+# 4-1. [v3 신규] 빠른 미리보기: 작은 층화 표본으로 KPI/차트를 먼저 그린 뒤, 같은 자리(dashboard_slot)를 덮어쓰며 정밀화
+# (도중에 필터를 바꾸면 Streamlit이 이 실행을 멈추고 새 필터로 다시 시작하므로, 사용자의 다음 조작을 막지 않음)
+dashboard_slot = st.empty()
+
+if progressive_mode:
+    sample_levels = build_sample_levels(data_version, df_merged)
+    for fraction, df_sample in sample_levels.items():
+        sample_data = apply_filters(df_sample)
+        if sample_data.empty or (sample_data['_pi'] >= 1).all():
+            continue  # (표본이 비었거나 사실상 전수라면 건너뛰고 바로 정확값 계산)
+        with dashboard_slot.container():
+            st.info(f"⚡ {fraction:.0%} 층화 표본({len(sample_data):,}건) 기반 추정치입니다. 정확한 값을 계산하는 중... (ⓘ: 95% 신뢰구간)")
+            render_kpis_and_charts(
+                approx_kpis.weighted(sample_data),
+                approx_kpis.estimate_kpis(sample_data, sample_data['_pi'].to_numpy()),
+                stage=f"sample_{fraction}"
+            )
+
+# 4-2. 정확값: 전체 데이터로 계산해서 같은 자리를 덮어씀
+filtered_data = apply_filters(df_merged)
 
 if filtered_data.empty:
+    dashboard_slot.empty()
     st.warning("선택한 조건에 해당하는 성과 데이터가 없습니다.")
     st.stop()
 
-st.divider()
-
-# --- [5] 핵심 성과 지표 (KPI) 표시 (v2 대폭 수정) ---
-st.subheader(f"📈 총괄 성과 요약 (선택된 필터 기준)")
-
-# 5-1. KPI 계산
-total_revenue = filtered_data['revenue'].sum()
-total_cost = filtered_data['actual_cost'].sum()
-total_clicks = filtered_data['clicks'].sum()
-total_conversions = filtered_data['conversions'].sum()
-total_impressions = filtered_data['impressions'].sum() # [v2 신규]
-
-# 5-2. 0으로 나누기 방지
-roas = (total_revenue / total_cost) if total_cost > 0 else 0
-cpc = (total_cost / total_clicks) if total_clicks > 0 else 0
-cpa = (total_cost / total_conversions) if total_conversions > 0 else 0
-ctr = (total_clicks / total_impressions) if total_impressions > 0 else 0 # [v2 신규]
-cvr = (total_conversions / total_clicks) if total_clicks > 0 else 0      # [v2 신규]
-aov = (total_revenue / total_conversions) if total_conversions > 0 else 0 # [v2 신규]
-
-# 5-3. 3x2 그리드로 KPI 표시
-kpi_cols = st.columns(3)
-kpi_cols[0].metric("💰 총 매출 (Revenue)", f"{total_revenue:,.0f} 원")
-kpi_cols[1].metric("💸 총 비용 (Cost)", f"{total_cost:,.0f} 원")
-kpi_cols[2].metric("📈 총 ROAS", f"{roas:.2%}")
-
-kpi_cols = st.columns(3)
-kpi_cols[0].metric("🖱️ 클릭 대비 전환율 (CVR)", f"{cvr:.2%}")
-kpi_cols[1].metric("🎯 노출 대비 클릭률 (CTR)", f"{ctr:.2%}")
-kpi_cols[2].metric("🛍️ 평균 객단가 (AOV)", f"{aov:,.0f} 원")
-
-kpi_cols = st.columns(3)
-kpi_cols[0].metric("🫰 클릭당 비용 (CPC)", f"{cpc:,.1f} 원")
-kpi_cols[1].metric("🫰 전환당 비용 (CPA)", f"{cpa:,.1f} 원")
-
-
-# --- [6] 시각화 (Charts) (v2 대폭 수정) ---
-st.divider()
-st.subheader("📊 상세 분석 차트")
+with dashboard_slot.container():
+    render_kpis_and_charts(filtered_data, approx_kpis.estimate_kpis(filtered_data), stage='exact')
 
-# 6-1. [v2 신규] 날짜별 매출 추이 (Line Chart)
-st.markdown("#### 1. 날짜별 매출 추이")
-time_series_data = filtered_data.groupby(filtered_data['post_date'].dt.date)['revenue'].sum().reset_index()
-time_series_data = time_series_data.rename(columns={'post_date': '날짜', 'revenue': '매출액'})
-
-if time_series_data.empty:
-    st.info("시계열 차트를 그릴 날짜 데이터가 부족합니다.")
-else:
-    fig_time = px.line(
-        time_series_data, 
-        x='날짜', 
-        y='매출액', 
-        title='날짜별 매출 발생 추이',
-        markers=True,
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_time, use_container_width=True)
-
-
-# 6-2. [v2 신규] 비용-매출 효율성 분석 (Scatter Plot)
-st.markdown("#### 2. 인플루언서 효율성 분석 (비용 vs 매출)")
-inf_perf_agg = filtered_data.groupby('inf_name').agg(
-    total_cost=('actual_cost', 'sum'),
-    total_revenue=('revenue', 'sum'),
-    platform=('platform', 'first') # 플랫폼별로 색상 구분
-).reset_index()
-
-fig_scatter = px.scatter(
-    inf_perf_agg,
-    x='total_cost',
-    y='total_revenue',
-    color='platform', # 플랫폼별로 색상 구분
-    hover_name='inf_name', # 마우스 올리면 이름 표시
-    title='인플루언서별 비용 vs 매출 (효율성 사분면)',
-    labels={'total_cost': '총 집행 비용 (원)', 'total_revenue': '총 발생 매출 (원)'},
-    template='plotly_white'
-)
-fig_scatter.add_hline(y=inf_perf_agg['total_revenue'].mean(), line_dash="dot", annotation_text="평균 매출")
-fig_scatter.add_vline(x=inf_perf_agg['total_cost'].mean(), line_dash="dot", annotation_text="평균 비용")
-st.plotly_chart(fig_scatter, use_container_width=True)
 
+# 6-5. [v3 신규] 도달 인플루언서 수 / ROAS·CPA 분포 (요약본 기반)
+# (원본 행을 다시 집계하지 않고, 미리 만든 칸별 요약본(HLL / 분위수 스케치)만 합쳐서 계산 → 오차 약 1~2%)
+# (요약본 생성/갱신은 백그라운드 작업 → 페이지는 저장된 요약본 파일만 읽음)
+@st.cache_data
+def load_saved_sketches(sketch_mtime):
+    return perf_sketches.load_saved()
 
-# 6-3. [v2 신규] 플랫폼별 / 카테고리별 성과 (Bar/Pie Charts)
-st.markdown("#### 3. 플랫폼 및 카테고리별 성과 분석")
-col1, col2 = st.columns(2)
+st.markdown("#### 5. 도달 인플루언서 수 및 성과 분포 (추정치)")
+try:
+    saved_sketches = load_saved_sketches(perf_sketches.sketch_mtime())
+    if perf_sketches.is_stale(saved_sketches):
+        sketch_failure = background_jobs.failed_for('perf_sketches', perf_sketches.source_key())
+        if sketch_failure:
+            # (같은 입력으로 이미 실패했으면 다시 띄우지 않음)
+            st.error(f"❌ 요약본 갱신 실패 ({sketch_failure['finished_at']}): {sketch_failure['error']}")
+            with st.expander("📜 요약본 갱신 로그 (마지막 20줄)"):
+                st.code(background_jobs.log_tail('perf_sketches') or "(로그 없음)")
+        else:
+            background_jobs.launch('perf_sketches.py', 'perf_sketches')
+            st.caption("⏳ 요약본을 백그라운드에서 갱신하는 중입니다. (그동안은 이전 요약본 기준, 새로고침하면 반영됩니다)")
+    if saved_sketches is None:
+        st.info("요약본을 처음 만드는 중입니다. 잠시 후 새로고침하면 분포 지표가 표시됩니다.")
+    else:
+        sketches = saved_sketches['sketches']
+        selected_product_ids = df_prod[df_prod['product_name'].isin(selected_products)]['product_id']
+        sketch_campaign_ids = df_camp[
+            df_camp['campaign_id'].isin(selected_campaign_ids) & df_camp['product_id'].isin(selected_product_ids)
+        ]['campaign_id'].tolist()
+        sketch_filters = dict(
+            campaign_ids=sketch_campaign_ids,
+            start_date=selected_date_range[0] or None,
+            end_date=selected_date_range[1] if len(selected_date_range) > 1 else None,
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            # 플랫폼별 고유 인플루언서 수 (HyperLogLog)
+            reach_by_platform = perf_sketches.query(sketches, group_by=['platform'], **sketch_filters)
+            fig_reach = px.bar(
+                reach_by_platform,
+                x='platform', y='distinct_influencers',
+                title='플랫폼별 참여 인플루언서 수 (중복 제외)',
+                labels={'platform': '플랫폼', 'distinct_influencers': '인플루언서 수'},
+                template='plotly_white',
+                color='platform'
+            )
+            st.plotly_chart(fig_reach, use_container_width=True)
+
+        with col2:
+            # 인플루언서 규모별 포스트 ROAS / CPA 분포 (분위수 스케치)
+            dist_by_cohort = perf_sketches.query(sketches, group_by=['cohort'], **sketch_filters)
+            st.dataframe(
+                dist_by_cohort[['cohort', 'posts', 'distinct_influencers', 'roas_p50', 'roas_p90', 'cpa_p50', 'cpa_p90']],
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "cohort": "인플루언서 규모",
+                    "posts": st.column_config.NumberColumn("포스트 수", format="%d건"),
+                    "distinct_influencers": st.column_config.NumberColumn("인플루언서 수", format="%d명"),
+                    "roas_p50": st.column_config.NumberColumn("ROAS 중앙값", format="%.2f"),
+                    "roas_p90": st.column_config.NumberColumn("ROAS 상위10%", format="%.2f"),
+                    "cpa_p50": st.column_config.NumberColumn("CPA 중앙값", format="%.0f원"),
+                    "cpa_p90": st.column_config.NumberColumn("CPA 상위10%", format="%.0f원"),
+                }
+            )
+except Exception as e:
+    st.info(f"요약본을 불러오지 못해 분포 지표를 표시할 수 없습니다: {e}")
 
-with col1:
-    # 플랫폼별 ROAS (Bar Chart)
-    platform_perf = filtered_data.groupby('platform').agg(
-        revenue=('revenue', 'sum'),
-        actual_cost=('actual_cost', 'sum')
-    ).reset_index()
-    platform_perf['ROAS'] = (platform_perf['revenue'] / platform_perf['actual_cost']).fillna(0)
-    platform_perf = platform_perf.sort_values(by='ROAS', ascending=False)
-    
-    fig_platform = px.bar(
-        platform_perf,
-        x='platform',
-        y='ROAS',
-        title='플랫폼별 ROAS',
-        labels={'platform': '플랫폼', 'ROAS': 'ROAS'},
-        template='plotly_white',
-        color='platform'
-    )
-    fig_platform.update_yaxes(tickformat=".1%")
-    st.plotly_chart(fig_platform, use_container_width=True)
 
-with col2:
-    # 제품 카테고리별 매출 비중 (Pie Chart)
-    category_perf = filtered_data.groupby('category').agg(
-        revenue=('revenue', 'sum')
-    ).reset_index()
-    
-    fig_category = px.pie(
-        category_perf,
-        names='category',
-        values='revenue',
-        title='제품 카테고리별 매출 비중',
-        hole=0.3, # 도넛 차트
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_category, use_container_width=True)
+# 6-6. 원본 데이터 보여주기 (옵션)
+with st.expander("📂 필터링된 원본 데이터 보기 (Merged Data)"):
+    st.dataframe(filtered_data.drop(columns=approx_kpis.KEY_COLUMNS), use_container_width=True)
 
 
-# 6-4. 기존 차트 (인플루언서/캠페인별 랭킹)
-st.markdown("#### 4. 성과 랭킹 (Top 10)")
-col1, col2 = st.columns(2)
+# --- [7] [v3 신규] 캠페인 리포트 다운로드 (미리 생성된 파일) ---
+st.divider()
+st.subheader("📥 캠페인 리포트 다운로드")
 
-with col1:
-    # 인플루언서별 매출 랭킹 (v1과 동일)
-    inf_performance = filtered_data.groupby('inf_name').agg(
-        revenue=('revenue', 'sum'),
-        actual_cost=('actual_cost', 'sum')
-    ).reset_index()
-    inf_performance = inf_performance.sort_values(by='revenue', ascending=False)
+report_manifest = campaign_reports.load_manifest()
+report_campaign_ids = [cid for cid in selected_campaign_ids if cid in report_manifest]
 
-    fig_inf = px.bar(
-        inf_performance.head(10),
-        x='inf_name', y='revenue',
-        title='인플루언서별 발생 매출 (Top 10)',
-        labels={'inf_name': '인플루언서', 'revenue': '발생 매출'},
-        template='plotly_white'
-    )
-    st.plotly_chart(fig_inf, use_container_width=True)
+def read_report_file(path):
+    """다운로드 버튼을 '눌렀을 때만' 파일을 읽음 (새로고침마다 큰 Excel 파일을 읽지 않도록)"""
+    with open(path, 'rb') as f:
+        return f.read()
 
-with col2:
-    # 캠페인별 ROAS 랭킹 (v1과 동일)
-    camp_performance = filtered_data.groupby('campaign_name').agg(
-        revenue=('revenue', 'sum'),
-        actual_cost=('actual_cost', 'sum')
-    ).reset_index()
-    camp_performance['ROAS'] = (camp_performance['revenue'] / camp_performance['actual_cost']).fillna(0)
-    camp_performance = camp_performance.sort_values(by='ROAS', ascending=False)
-
-    fig_camp = px.bar(
-        camp_performance.head(10),
-        x='campaign_name', y='ROAS',
-        title='캠페인별 ROAS (Top 10)',
-        labels={'campaign_name': '캠페인', 'ROAS': 'ROAS'},
-        template='plotly_white'
+if not report_campaign_ids:
+    st.info("선택한 캠페인의 리포트가 아직 없습니다. 터미널에서 `python campaign_reports.py`를 실행하면 모든 캠페인의 리포트가 미리 만들어집니다.")
+else:
+    report_campaign_id = st.selectbox(
+        "리포트를 받을 캠페인",
+        options=report_campaign_ids,
+        format_func=lambda cid: f"{report_manifest[cid]['campaign_name']} ({cid})"
     )
-    fig_camp.update_yaxes(tickformat=".1%")
-    st.plotly_chart(fig_camp, use_container_width=True)
-
+    report_entry = report_manifest[report_campaign_id]
+    st.caption(f"생성 시각: {report_entry['generated_at']}")
 
-# 6-5. 원본 데이터 보여주기 (옵션)
-with st.expander("📂 필터링된 원본 데이터 보기 (Merged Data)"):
-    st.dataframe(filtered_data, use_container_width=True)
\ No newline at end of file
+    # (리포트를 만든 뒤 해당 캠페인 데이터가 바뀌었으면 → 다운로드는 가능하지만 옛날 데이터임을 표시)
+    # (현재 데이터 버전은 백그라운드 작업이 reports/versions.json에 저장 → 페이지는 파일만 비교)
+    try:
+        report_versions = campaign_reports.load_versions()
+        if report_versions is not None and report_versions['key'] == list(data_version):
+            if report_versions['versions'].get(report_campaign_id) != report_entry['version']:
+                st.warning("⚠️ 데이터 변경됨 – 재생성 필요: 리포트를 만든 뒤 이 캠페인의 데이터가 바뀌었습니다. 터미널에서 `python campaign_reports.py`를 실행해주세요.")
+        else:
+            version_failure = background_jobs.failed_for('campaign_versions', list(data_version))
+            if version_failure:
+                st.caption(f"리포트 데이터 버전을 확인하지 못했습니다: {version_failure['error']}")
+            else:
+                background_jobs.launch('campaign_reports.py', 'campaign_versions', args=['--versions-only'])
+                st.caption("⏳ 리포트가 최신 데이터 기준인지 확인하는 중입니다. (새로고침하면 반영됩니다)")
+    except Exception as e:
+        st.caption(f"리포트 데이터 버전을 확인하지 못했습니다: {e}")
+
+    report_mimes = {
+        'html': ('🌐 HTML', 'text/html'),
+        'png': ('🖼️ PNG', 'image/png'),
+        'xlsx': ('📊 Excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    }
+    download_cols = st.columns(len(report_mimes))
+    for col, (fmt, (label, mime)) in zip(download_cols, report_mimes.items()):
+        file_name = report_entry['files'].get(fmt)
+        file_path = os.path.join(campaign_reports.REPORT_DIR, file_name) if file_name else None
+        if file_path and os.path.exists(file_path):
+            col.download_button(
+                label=f"{label} 다운로드", data=functools.partial(read_report_file, file_path),
+                file_name=file_name, mime=mime
+            )
+        else:
+            col.button(label=f"{label} (없음)", disabled=True, key=f"report_missing_{fmt}")
@@ -1,12 +1,17 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import date
 import os 
+import hashlib
+import background_jobs
+import genai_enrichment
 
 # --- [1] 데이터 파일 경로 설정 ---
 BASE_PATH = "table/"
 PRODUCT_MASTER_FILE = os.path.join(BASE_PATH, 'product_master.csv')
 CAMPAIGN_MASTER_FILE = os.path.join(BASE_PATH, 'campaign_master.csv')
+INFLUENCER_MASTER_FILE = os.path.join(BASE_PATH, 'influencer_master.csv')
 
 # --- [2] 데이터 로드 함수들 (동일) ---
 @st.cache_data
@@ -35,9 +40,23 @@ def load_campaign_data():
         st.error(f"캠페인 파일 로드 중 오류 발생: {e}")
         return pd.DataFrame()
 
+@st.cache_data
+def load_influencer_data():
+    """인플루언서 마스터(CSV)를 읽어옵니다. (대량 등록 시 ID 중복 검사용)"""
+    try:
+        df_inf = pd.read_csv(INFLUENCER_MASTER_FILE)
+        return df_inf
+    except FileNotFoundError:
+        st.error(f"😭 '{INFLUENCER_MASTER_FILE}' 파일을 찾을 수 없습니다!")
+        return pd.DataFrame()
+    except Exception as e:
+        st.error(f"인플루언서 파일 로드 중 오류 발생: {e}")
+        return pd.DataFrame()
+
 # --- [3] 데이터 로드 실행 ---
 df_prod = load_product_data()
 df_camp = load_campaign_data()
+df_inf = load_influencer_data()
 
 st.title("📝 기준 정보 관리")
 st.markdown("새로운 캠페인, 제품, 인플루언서 정보를 등록/관리합니다.")
@@ -171,4 +190,277 @@ else:
 
         except Exception as e:
             st.error(f"삭제 중 심각한 오류 발생: {e}")
-            st.error("CSV 파일이 다른 프로그램(예: 엑셀)에 의해 열려있는지 확인해보세요.")
\ No newline at end of file
+            st.error("CSV 파일이 다른 프로그램(예: 엑셀)에 의해 열려있는지 확인해보세요.")
+
+# --- [7] GenAI 분석 갱신 (백그라운드 실행) ---
+st.divider()
+st.subheader("GenAI 분석 갱신")
+st.markdown("인플루언서 브랜드 적합도 / 포스트 코멘트 요약을 다시 계산합니다. '내용이 바뀐' 행만 새로 분석하며, 백그라운드에서 실행되므로 기다리지 않고 대시보드를 계속 사용할 수 있습니다.")
+
+GENAI_LOG_FILE = background_jobs.log_path('genai_enrichment', BASE_PATH)
+
+# (table/ 폴더의 잠금 파일로 확인 → 다른 브라우저/사용자가 실행한 작업도 감지해서 중복 실행 방지)
+genai_running = background_jobs.is_running('genai_enrichment', BASE_PATH)
+
+# (운영 백엔드가 설정되지 않았으면 버튼 비활성화 → 테스트용 stub의 가짜 값이 실제 데이터를 덮어쓰지 않도록)
+genai_backend = genai_enrichment.configured_backend()
+if genai_backend is None:
+    st.warning(f"GenAI 백엔드가 설정되지 않았습니다. 환경변수 {genai_enrichment.BACKEND_ENV}에 '패키지.모듈:클래스명'을 지정한 뒤 대시보드를 다시 실행해주세요.")
+
+if st.button(label="🤖 GenAI 분석 갱신 시작 (백그라운드)", disabled=genai_running or genai_backend is None):
+    try:
+        launched = background_jobs.launch(
+            'genai_enrichment.py', 'genai_enrichment', args=['--backend', genai_backend], base_path=BASE_PATH
+        )
+        if launched:
+            st.success("✅ GenAI 분석을 시작했습니다! 끝나면 'Seeding 평가' / '성과 분석' 페이지에 자동으로 반영됩니다.")
+        else:
+            st.warning("이미 다른 곳에서 GenAI 분석이 실행 중입니다.")
+        genai_running = True
+    except Exception as e:
+        st.error(f"GenAI 분석 실행 중 오류 발생: {e}")
+
+if genai_running:
+    st.info("⏳ GenAI 분석이 실행 중입니다... (새로고침하면 진행 상태가 갱신됩니다)")
+elif os.path.exists(GENAI_LOG_FILE):
+    with st.expander("📜 최근 GenAI 분석 로그"):
+        with open(GENAI_LOG_FILE, encoding='utf-8') as log_file:
+            st.code(log_file.read() or "(로그 없음)")
+
+
+# --- [8] 대량 등록 (CSV/Excel 일괄 업로드) ---
+st.divider()
+st.subheader("대량 등록 (CSV/Excel 업로드)")
+st.markdown("수십만 건의 캠페인/제품/인플루언서를 파일 하나로 한 번에 등록합니다. 오류가 있는 행만 제외하고 나머지는 '한 번에' 저장됩니다.")
+
+# 8-1. 테이블별 등록 규칙
+# (columns: 저장 순서 = CSV 헤더 순서 / required: 필수 컬럼 / id_prefix: ID 자동 생성 규칙)
+BULK_TABLES = {
+    '캠페인': {
+        'file': CAMPAIGN_MASTER_FILE,
+        'loader': load_campaign_data,
+        'id_col': 'campaign_id',
+        'id_prefix': 'DALBA-CAMP-',
+        'columns': ['campaign_id', 'campaign_name', 'product_id', 'start_date', 'end_date', 'total_budget'],
+        'required': ['campaign_name', 'product_id', 'start_date', 'end_date', 'total_budget'],
+        'positive': ['total_budget'],
+        'non_negative': [],
+        'integer': ['total_budget'],
+    },
+    '제품': {
+        'file': PRODUCT_MASTER_FILE,
+        'loader': load_product_data,
+        'id_col': 'product_id',
+        'id_prefix': 'dalba-prod-',
+        'columns': ['product_id', 'product_name', 'category', 'price'],
+        'required': ['product_name', 'category', 'price'],
+        'positive': ['price'],
+        'non_negative': [],
+        'integer': ['price'],
+    },
+    '인플루언서': {
+        'file': INFLUENCER_MASTER_FILE,
+        'loader': load_influencer_data,
+        'id_col': 'inf_id',
+        'id_prefix': None,  # 인플루언서 ID는 계정명이라 자동 생성하지 않음 (필수 입력)
+        'columns': ['inf_id', 'inf_name', 'platform', 'follower_count', 'avg_engagement_rate',
+                    'main_category', 'estimated_cost_per_post', 'genai_brand_fit_score', 'genai_brand_fit_reason'],
+        'required': ['inf_id', 'inf_name', 'platform', 'follower_count', 'main_category', 'estimated_cost_per_post'],
+        'positive': [],
+        'non_negative': ['follower_count', 'avg_engagement_rate', 'estimated_cost_per_post', 'genai_brand_fit_score'],
+        'integer': ['follower_count', 'estimated_cost_per_post'],
+    },
+}
+
+def read_bulk_file(uploaded_file):
+    """업로드된 CSV/Excel을 '모두 문자열'로 읽어옵니다. (타입 변환은 검증 단계에서 한 번에)"""
+    if uploaded_file.name.lower().endswith(('.xlsx', '.xls')):
+        return pd.read_excel(uploaded_file, dtype=str)
+    return pd.read_csv(uploaded_file, dtype=str)
+
+def validate_bulk_rows(df_upload, table_key, df_existing, df_prod):
+    """
+    업로드 데이터를 '행 단위 반복 없이' 컬럼 전체에 대해 한 번에 검증합니다.
+    반환값: (저장 가능한 행 DataFrame, 오류 리포트 DataFrame['행 번호', '컬럼', '오류 사유'])
+    """
+    spec = BULK_TABLES[table_key]
+
+    # (1) 컬럼 정리: 없는 컬럼은 빈 값으로 채우고, 앞뒤 공백/빈 문자열은 결측치로 통일
+    df = df_upload.reset_index(drop=True).reindex(columns=spec['columns']).astype(object)
+    df = df.apply(lambda col: col.str.strip()).replace('', np.nan)
+
+    error_frames = []
+    def add_error(mask, column, reason):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            error_frames.append(pd.DataFrame({
+                '행 번호': df.index[mask] + 2,  # 엑셀 기준 행 번호 (헤더 = 1행)
+                '컬럼': column,
+                '오류 사유': reason,
+            }))
+
+    # (2) 필수값 누락
+    for col in spec['required']:
+        add_error(df[col].isna(), col, "필수값 누락")
+
+    # (3) 숫자 컬럼: 형식 / 범위 검사
+    for col in dict.fromkeys(spec['positive'] + spec['non_negative'] + spec['integer']):
+        numeric = pd.to_numeric(df[col], errors='coerce')
+        add_error(df[col].notna() & numeric.isna(), col, "숫자 형식이 아님")
+        if col in spec['positive']:
+            add_error(numeric <= 0, col, "0보다 커야 함")
+        if col in spec['non_negative']:
+            add_error(numeric < 0, col, "0 이상이어야 함")
+        if col in spec['integer']:
+            add_error(numeric.notna() & (numeric % 1 != 0), col, "정수가 아님")
+            add_error(numeric.abs() >= np.iinfo('int64').max, col, "허용 범위를 벗어난 값")  # (float 비교라 경계값 2^63도 제외)
+        df[col] = numeric
+
+    # (4) 캠페인 전용 규칙: 날짜 형식/순서 + product_id 존재 여부(제품 마스터와 해시 조인)
+    if table_key == '캠페인':
+        for col in ['start_date', 'end_date']:
+            parsed = pd.to_datetime(df[col], errors='coerce')
+            add_error(df[col].notna() & parsed.isna(), col, "날짜 형식이 아님 (예: 2025-01-31)")
+            df[col] = parsed
+        add_error(df['end_date'] < df['start_date'], 'end_date', "종료일이 시작일보다 빠름")
+
+        fk_check = df[['product_id']].merge(
+            df_prod[['product_id']].drop_duplicates(), on='product_id', how='left', indicator=True
+        )
+        add_error(df['product_id'].notna() & (fk_check['_merge'] == 'left_only'), 'product_id',
+                  "제품 마스터에 없는 product_id")
+
+    # (5) ID 중복: 파일 내부 중복 + 기존 마스터와 중복
+    id_col = spec['id_col']
+    has_id = df[id_col].notna()
+    add_error(has_id & df[id_col].duplicated(keep=False), id_col, "파일 안에서 ID 중복")
+    if not df_existing.empty:
+        add_error(has_id & df[id_col].isin(df_existing[id_col]), id_col, "이미 등록된 ID")
+
+    if error_frames:
+        df_errors = pd.concat(error_frames, ignore_index=True).sort_values('행 번호', kind='stable')
+    else:
+        df_errors = pd.DataFrame(columns=['행 번호', '컬럼', '오류 사유'])
+
+    df_valid = df[~df.index.isin(df_errors['행 번호'] - 2)].copy()
+    for col in spec['integer']:
+        df_valid[col] = df_valid[col].astype('int64')  # (소수점 값은 위에서 오류 처리 → 값이 바뀌지 않음)
+    if table_key == '캠페인':
+        for col in ['start_date', 'end_date']:
+            df_valid[col] = df_valid[col].dt.strftime('%Y-%m-%d')
+
+    return df_valid, df_errors.reset_index(drop=True)
+
+def assign_new_ids(df_valid, table_key, df_existing):
+    """ID가 비어있는 행에 '기존 최대 번호 + 1'부터 순서대로 새 ID를 한 번에 부여합니다."""
+    spec = BULK_TABLES[table_key]
+    id_col, prefix = spec['id_col'], spec['id_prefix']
+    missing = df_valid[id_col].isna()
+    if prefix is None or not missing.any():
+        return df_valid
+
+    # (기존 마스터 + 업로드 파일에 이미 적힌 ID 중 가장 큰 번호를 찾음)
+    known_ids = pd.concat([df_existing.get(id_col, pd.Series(dtype=object)), df_valid[id_col]]).dropna()
+    id_nums = pd.to_numeric(known_ids.astype(str).str.split('-').str[-1], errors='coerce')
+    last_id_num = int(id_nums.max()) if id_nums.notna().any() else 0
+
+    new_nums = np.arange(last_id_num + 1, last_id_num + 1 + missing.sum())
+    df_valid.loc[missing, id_col] = [f"{prefix}{n:03d}" for n in new_nums]
+    return df_valid
+
+# 8-2. 업로드 UI
+df_existing_by_table = {'캠페인': df_camp, '제품': df_prod, '인플루언서': df_inf}
+
+bulk_table_key = st.radio("등록할 데이터 종류", options=list(BULK_TABLES.keys()), horizontal=True)
+st.caption(
+    "필요한 컬럼: " + ", ".join(BULK_TABLES[bulk_table_key]['columns']) +
+    f"  (필수: {', '.join(BULK_TABLES[bulk_table_key]['required'])})"
+)
+# (저장 성공 후 rerun 되기 전에 남겨둔 결과 메시지 표시)
+for level, message in st.session_state.pop('bulk_import_messages', []):
+    getattr(st, level)(message)
+
+# (업로더 key를 저장할 때마다 바꿔서 → 저장 후에는 업로드 파일이 비워짐 = 같은 파일 중복 등록 방지)
+bulk_upload_round = st.session_state.setdefault('bulk_upload_round', 0)
+uploaded_file = st.file_uploader(
+    "CSV 또는 Excel 파일 업로드", type=['csv', 'xlsx', 'xls'], key=f"bulk_upload_{bulk_upload_round}"
+)
+
+if uploaded_file is not None:
+    df_existing = df_existing_by_table[bulk_table_key]
+
+    # (이번 세션에서 이미 등록한 파일을 다시 올린 경우 → 자동 생성 ID로 중복 등록되지 않도록 차단)
+    upload_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    if upload_hash in st.session_state.setdefault('bulk_imported_hashes', set()):
+        st.warning("⚠️ 이미 등록한 파일과 내용이 같습니다. 중복 등록을 막기 위해 저장하지 않습니다.")
+        st.stop()
+    try:
+        df_upload = read_bulk_file(uploaded_file)
+    except ImportError:
+        st.error("Excel 파일을 읽으려면 'openpyxl' 패키지가 필요합니다. (pip install openpyxl) 또는 CSV로 업로드해주세요.")
+        st.stop()
+    except Exception as e:
+        st.error(f"업로드 파일을 읽는 중 오류 발생: {e}")
+        st.stop()
+
+    missing_cols = [col for col in BULK_TABLES[bulk_table_key]['required'] if col not in df_upload.columns]
+    if missing_cols:
+        st.warning(f"업로드 파일에 필수 컬럼이 없습니다: {', '.join(missing_cols)}")
+
+    if bulk_table_key == '캠페인' and df_prod.empty:
+        st.error("제품 마스터 로드에 실패하여 product_id를 검증할 수 없습니다.")
+        st.stop()
+
+    # 8-3. 검증 결과 요약
+    df_valid, df_errors = validate_bulk_rows(df_upload, bulk_table_key, df_existing, df_prod)
+    n_invalid = len(df_upload) - len(df_valid)
+
+    result_cols = st.columns(3)
+    result_cols[0].metric("📄 전체 행", f"{len(df_upload):,} 건")
+    result_cols[1].metric("✅ 저장 가능", f"{len(df_valid):,} 건")
+    result_cols[2].metric("❌ 오류 행", f"{n_invalid:,} 건")
+
+    if not df_errors.empty:
+        with st.expander(f"⚠️ 오류 상세 보기 ({len(df_errors):,}건)"):
+            st.dataframe(df_errors, use_container_width=True)
+        st.download_button(
+            label="📥 오류 리포트 다운로드 (CSV)",
+            data=df_errors.to_csv(index=False).encode('utf-8-sig'),
+            file_name=f"bulk_import_errors_{bulk_table_key}.csv",
+            mime="text/csv"
+        )
+
+    # 8-4. '일괄 등록' 버튼: 유효한 행을 한 번에 Append + 해당 테이블 캐시만 갱신
+    bulk_button = st.button(
+        label=f"💾 유효한 {len(df_valid):,}건 일괄 등록하기",
+        type="primary",
+        disabled=df_valid.empty
+    )
+
+    if bulk_button:
+        try:
+            spec = BULK_TABLES[bulk_table_key]
+            df_to_save = assign_new_ids(df_valid, bulk_table_key, df_existing)
+
+            # (CSV에 한 번에 Append)
+            df_to_save[spec['columns']].to_csv(
+                spec['file'],
+                mode='a', header=False, index=False, encoding='utf-8'
+            )
+
+            # (전체 캐시가 아니라, 방금 수정한 테이블의 캐시만 지우기)
+            spec['loader'].clear()
+
+            messages = [('success', f"✅ {bulk_table_key} {len(df_to_save):,}건이 '{os.path.basename(spec['file'])}' 파일에 '일괄 추가'되었습니다!")]
+            if n_invalid:
+                messages.append(('info', f"오류가 있는 {n_invalid:,}건은 저장하지 않았습니다. 오류 리포트를 수정 후 다시 업로드해주세요."))
+
+            # [!] 업로더 초기화 + 새로고침: '일괄 등록'을 다시 눌러도 같은 행이 두 번 저장되지 않게 함
+            st.session_state['bulk_imported_hashes'].add(upload_hash)
+            st.session_state['bulk_import_messages'] = messages
+            st.session_state['bulk_upload_round'] += 1
+            st.rerun()
+
+        except Exception as e:
+            st.error(f"일괄 저장 중 심각한 오류 발생: {e}")
+            st.error("CSV 파일이 다른 프로그램(예: 엑셀)에 의해 열려있는지 확인해보세요.")
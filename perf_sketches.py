@@ -0,0 +1,319 @@
+"""
+성과 데이터 확률적 요약(sketch)
+
+원본 행을 매번 다시 집계하지 않고, (날짜, 캠페인, 플랫폼, 인플루언서 규모) 칸(cell)마다
+'합칠 수 있는(mergeable)' 요약본을 미리 만들어 둡니다. 필터 조합이 무엇이든 해당 칸들의
+요약본만 합치면 되므로, 메모리/계산량이 원본 행 수와 무관합니다.
+
+    - HyperLogLog: 중복 없는 인플루언서 수(도달 인플루언서) 추정, 오차 약 1.04/sqrt(2^HLL_P) ≈ 2.3%
+    - 로그 버킷 분위수 스케치(DDSketch 방식): 포스트별 ROAS / CPC / CPA의 p50, p90 추정,
+      상대 오차 QUANTILE_ALPHA(1%) 이내
+    - 매출/비용/클릭 등 합계 지표는 칸별로 정확한 합계를 같이 저장
+
+저장 형식 (모두 '긴(long)' DataFrame → 값이 있는 칸/레지스터/버킷만 저장)
+    cells    : cell_id, post_date, campaign_id, platform, cohort, posts, revenue, actual_cost, ...
+    hll      : cell_id, register, rank        (칸별 HLL 레지스터 중 0이 아닌 것만)
+    quantile : cell_id, metric, key, count    (칸별 로그 버킷 개수)
+
+증분 갱신
+    성과 테이블에 행이 추가되면 새 행만 요약본으로 만든 뒤 기존 요약본과 합칩니다. (merge_sketches)
+    인플루언서 마스터가 바뀌거나(플랫폼/팔로워 수 변경) 성과 파일이 통째로 교체되면 전체를 다시 만듭니다.
+    (인플루언서 마스터에 없는 inf_id 행은 대시보드 KPI와 같이 요약본에서도 제외합니다)
+    대시보드는 저장된 요약본만 읽고, 오래됐으면 이 스크립트를 백그라운드로 띄웁니다. (background_jobs)
+
+사용법
+    python perf_sketches.py           # 요약본 생성/갱신 (table/.perf_sketches.pkl)
+    python perf_sketches.py --full    # 전체 재생성
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import background_jobs
+import data_quality
+
+# --- [1] 설정 ---
+BASE_PATH = "table/"
+SKETCH_FILE = '.perf_sketches.pkl'
+SKETCH_VERSION = 2  # 요약 방식(포함 행 기준 등)을 바꾸면 올려서 전체 재생성
+
+HLL_P = 11                  # 레지스터 2^11 = 2048개
+HLL_M = 1 << HLL_P
+QUANTILE_ALPHA = 0.01       # 분위수 상대 오차 1%
+GAMMA = (1 + QUANTILE_ALPHA) / (1 - QUANTILE_ALPHA)
+LOG_GAMMA = np.log(GAMMA)
+ZERO_KEY = np.iinfo(np.int32).min  # 값이 0인 포스트(예: 매출 0 → ROAS 0)용 버킷
+
+CELL_KEYS = ['post_date', 'campaign_id', 'platform', 'cohort']
+SUM_COLUMNS = ['posts', 'revenue', 'actual_cost', 'impressions', 'clicks', 'conversions']
+METRICS = {
+    # 지표명: (분자, 분모)  → 분모가 0보다 큰 포스트만 분포에 포함
+    'roas': ('revenue', 'actual_cost'),
+    'cpc': ('actual_cost', 'clicks'),
+    'cpa': ('actual_cost', 'conversions'),
+}
+
+# 인플루언서 규모(팔로워 수) 구간
+COHORT_BINS = [0, 10_000, 100_000, 1_000_000, np.inf]
+COHORT_LABELS = ['나노 (~1만)', '마이크로 (1만~10만)', '매크로 (10만~100만)', '메가 (100만~)']
+UNKNOWN = '미상'
+
+
+# --- [2] HyperLogLog / 분위수 스케치 기본 연산 ---
+def _hll_registers(values):
+    """값마다 (레지스터 번호, rank)를 벡터 연산으로 계산합니다."""
+    h = pd.util.hash_array(np.asarray(values, dtype=object))  # uint64, 실행마다 같은 값
+    register = (h >> np.uint64(64 - HLL_P)).astype(np.int64)
+    low_bits = (h & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    _, bit_length = np.frexp(low_bits)  # 32비트 정수는 float64로 정확히 표현됨
+    rank = (33 - bit_length).astype(np.uint8)  # 앞쪽 0비트 개수 + 1
+    return register, rank
+
+def hll_estimate(ranks):
+    """0이 아닌 레지스터 rank 배열 → 고유값 개수 추정 (작은 값은 linear counting 보정)"""
+    ranks = np.asarray(ranks, dtype=np.float64)
+    zeros = HLL_M - len(ranks)
+    harmonic = zeros + np.sum(np.exp2(-ranks))
+    alpha = 0.7213 / (1 + 1.079 / HLL_M)
+    estimate = alpha * HLL_M * HLL_M / harmonic
+    if estimate <= 2.5 * HLL_M and zeros > 0:
+        estimate = HLL_M * np.log(HLL_M / zeros)
+    return estimate
+
+def _quantile_keys(values):
+    """양수 값 → 로그 버킷 번호, 0 → ZERO_KEY"""
+    values = np.asarray(values, dtype=np.float64)
+    keys = np.full(len(values), ZERO_KEY, dtype=np.int64)
+    positive = values > 0
+    keys[positive] = np.ceil(np.log(values[positive]) / LOG_GAMMA).astype(np.int64)
+    return keys
+
+def quantile_from_buckets(keys, counts, q):
+    """버킷(key, count) → q 분위수 추정값"""
+    order = np.argsort(keys)
+    keys, counts = np.asarray(keys)[order], np.asarray(counts)[order]
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    idx = np.searchsorted(np.cumsum(counts), q * (total - 1), side='right')
+    key = keys[min(idx, len(keys) - 1)]
+    return 0.0 if key == ZERO_KEY else 2 * GAMMA ** key / (GAMMA + 1)
+
+
+# --- [3] 요약본 만들기 / 합치기 ---
+def _prepare_rows(df_perf, df_inf):
+    """
+    성과 행에 인플루언서 플랫폼/규모를 붙이고, 칸(cell) 키 컬럼을 정리합니다.
+    인플루언서 마스터에 없는 inf_id 행은 제외합니다. (성과 분석 페이지의 KPI와 같은 기준)
+    """
+    inf = df_inf.drop_duplicates('inf_id').set_index('inf_id')
+    df_perf = df_perf[df_perf['inf_id'].astype(str).isin(inf.index.astype(str))]
+    inf_ids = df_perf['inf_id'].astype(str)
+    df = pd.DataFrame({
+        'inf_id': inf_ids,
+        'post_date': pd.to_datetime(df_perf['post_date'], errors='coerce').dt.normalize(),
+        'campaign_id': df_perf['campaign_id'].astype(str),
+        'platform': inf_ids.map(inf['platform']).fillna(UNKNOWN),
+        'cohort': pd.cut(inf_ids.map(inf['follower_count']), bins=COHORT_BINS, labels=COHORT_LABELS, right=False)
+                    .astype(object).fillna(UNKNOWN),
+    })
+    for col in SUM_COLUMNS[1:]:
+        df[col] = pd.to_numeric(df_perf[col], errors='coerce').fillna(0).to_numpy()
+    df['posts'] = 1
+    return df
+
+def _compact(cells, hll, quantile):
+    """같은 칸 키를 가진 행들을 하나로 합칩니다. (합계는 sum, HLL 레지스터는 max, 버킷 개수는 sum)"""
+    new_id = cells.groupby(CELL_KEYS, dropna=False, sort=False).ngroup().to_numpy()
+    id_map = pd.Series(new_id, index=cells['cell_id'].to_numpy())
+    id_map = id_map[~id_map.index.duplicated()]  # (같은 cell_id는 항상 같은 칸 키 → 첫 번째만 남김)
+
+    cells = (cells.assign(cell_id=new_id)
+                  .groupby(['cell_id'] + CELL_KEYS, dropna=False, as_index=False, sort=False)[SUM_COLUMNS].sum())
+    hll = (hll.assign(cell_id=id_map.reindex(hll['cell_id']).to_numpy())
+              .groupby(['cell_id', 'register'], as_index=False)['rank'].max())
+    quantile = (quantile.assign(cell_id=id_map.reindex(quantile['cell_id']).to_numpy())
+                        .groupby(['cell_id', 'metric', 'key'], as_index=False)['count'].sum())
+    return {'cells': cells, 'hll': hll, 'quantile': quantile}
+
+def build_sketches(df_perf, df_inf):
+    """성과 행 → 칸별 요약본(cells / hll / quantile)"""
+    df = _prepare_rows(df_perf, df_inf)
+    df['cell_id'] = df.groupby(CELL_KEYS, dropna=False, sort=False).ngroup()
+
+    cells = df[['cell_id'] + CELL_KEYS + SUM_COLUMNS]
+
+    register, rank = _hll_registers(df['inf_id'])
+    hll = pd.DataFrame({'cell_id': df['cell_id'].to_numpy(), 'register': register, 'rank': rank})
+
+    quantile_frames = []
+    for metric, (numerator, denominator) in METRICS.items():
+        valid = (df[denominator] > 0).to_numpy()
+        values = (df[numerator] / df[denominator]).to_numpy()[valid]
+        quantile_frames.append(pd.DataFrame({
+            'cell_id': df['cell_id'].to_numpy()[valid],
+            'metric': metric,
+            'key': _quantile_keys(values),
+            'count': 1,
+        }))
+    quantile = pd.concat(quantile_frames, ignore_index=True)
+
+    return _compact(cells, hll, quantile)
+
+def merge_sketches(a, b):
+    """요약본 두 개를 합칩니다. (b의 cell_id를 a 뒤로 밀어서 겹치지 않게 한 뒤 compact)"""
+    offset = int(a['cells']['cell_id'].max()) + 1 if len(a['cells']) else 0
+    shift = lambda df: df.assign(cell_id=df['cell_id'] + offset)
+    return _compact(
+        pd.concat([a['cells'], shift(b['cells'])], ignore_index=True),
+        pd.concat([a['hll'], shift(b['hll'])], ignore_index=True),
+        pd.concat([a['quantile'], shift(b['quantile'])], ignore_index=True),
+    )
+
+
+# --- [4] 저장 / 증분 갱신 ---
+def source_key(base_path=BASE_PATH):
+    """요약본의 입력 상태 [인플루언서 마스터 수정 시각, 성과 파일 크기, 성과 파일 inode] (백그라운드 작업 상태 키로도 사용)"""
+    return [
+        os.path.getmtime(os.path.join(base_path, 'influencer_master.csv')),
+        os.path.getsize(os.path.join(base_path, 'campaign_performance.csv')),
+        data_quality.performance_file_id(base_path),
+    ]
+
+def sketch_mtime(base_path=BASE_PATH):
+    """저장된 요약본 파일의 수정 시각 (없으면 0, 대시보드 캐시 키로 사용)"""
+    sketch_path = os.path.join(base_path, SKETCH_FILE)
+    return os.path.getmtime(sketch_path) if os.path.exists(sketch_path) else 0
+
+def load_saved(base_path=BASE_PATH):
+    """저장된 요약본 (메타 정보 포함 dict)만 읽습니다. 없거나 깨졌으면 None"""
+    sketch_path = os.path.join(base_path, SKETCH_FILE)
+    if not os.path.exists(sketch_path):
+        return None
+    try:
+        return pd.read_pickle(sketch_path)
+    except Exception:
+        return None  # (깨진 파일이면 전체 재생성)
+
+def is_stale(saved, base_path=BASE_PATH):
+    """요약본이 없거나, 만든 뒤 인플루언서 마스터/성과 파일이 바뀌었으면 True"""
+    if saved is None or saved.get('version') != SKETCH_VERSION:
+        return True
+    inf_mtime, perf_size, perf_file_id = source_key(base_path)
+    return not (
+        saved['inf_mtime'] == inf_mtime
+        and saved.get('perf_file_id') == perf_file_id
+        and saved['perf_offset'] == perf_size
+    )
+
+def load_or_build(base_path=BASE_PATH, full=False):
+    """
+    저장된 요약본을 불러오고, 성과 테이블에 새 행이 있으면 그 행만 요약해서 합칩니다.
+    인플루언서 마스터가 바뀌었거나 성과 파일이 다시 써졌으면 전체를 다시 만듭니다.
+    """
+    sketch_path = os.path.join(base_path, SKETCH_FILE)
+    inf_mtime, perf_size, perf_file_id = source_key(base_path)
+    saved = None if full else load_saved(base_path)
+
+    incremental = (
+        saved is not None
+        and saved.get('version') == SKETCH_VERSION
+        and saved['inf_mtime'] == inf_mtime
+        and saved.get('perf_file_id') == perf_file_id
+        and saved['perf_offset'] <= perf_size
+    )
+    if incremental and saved['perf_offset'] == perf_size:
+        return saved['sketches']  # 새 행 없음
+
+    df_inf = pd.read_csv(os.path.join(base_path, 'influencer_master.csv'))
+    df_perf, header, perf_offset = data_quality.read_performance(base_path, saved['perf_offset'] if incremental else 0)
+    if incremental and header != saved['perf_header']:
+        incremental = False
+        df_perf, header, perf_offset = data_quality.read_performance(base_path, 0)
+
+    sketches = build_sketches(df_perf, df_inf)
+    if incremental:
+        sketches = merge_sketches(saved['sketches'], sketches)
+
+    tmp_path = sketch_path + '.tmp'
+    pd.to_pickle({'version': SKETCH_VERSION, 'inf_mtime': inf_mtime, 'perf_header': header, 'perf_file_id': perf_file_id,
+                  'perf_offset': perf_offset, 'sketches': sketches}, tmp_path)
+    os.replace(tmp_path, sketch_path)
+    return sketches
+
+
+# --- [5] 필터 조합 질의 ---
+def query(sketches, campaign_ids=None, start_date=None, end_date=None, platforms=None, cohorts=None, group_by=None):
+    """
+    필터에 맞는 칸들의 요약본만 합쳐서 지표를 계산합니다. (원본 행은 보지 않음)
+    group_by: None(전체 1행) 또는 CELL_KEYS 중 컬럼 리스트 (예: ['platform'])
+    반환 컬럼: 그룹 키 + SUM_COLUMNS + distinct_influencers + roas/cpc/cpa의 p50, p90
+    """
+    cells = sketches['cells']
+    mask = np.ones(len(cells), dtype=bool)
+    if campaign_ids is not None:
+        mask &= cells['campaign_id'].isin(campaign_ids).to_numpy()
+    if platforms is not None:
+        mask &= cells['platform'].isin(platforms).to_numpy()
+    if cohorts is not None:
+        mask &= cells['cohort'].isin(cohorts).to_numpy()
+    if start_date is not None:
+        mask &= (cells['post_date'] >= pd.to_datetime(start_date)).to_numpy()
+    if end_date is not None:
+        mask &= (cells['post_date'] <= pd.to_datetime(end_date)).to_numpy()
+
+    group_by = list(group_by or [])
+    cells = cells[mask].assign(_group=0) if not group_by else cells[mask]
+    keys = group_by or ['_group']
+    if cells.empty:
+        metric_columns = [f'{metric}_p{q}' for metric in METRICS for q in (50, 90)]
+        return pd.DataFrame(columns=group_by + SUM_COLUMNS + ['distinct_influencers'] + metric_columns)
+
+    result = cells.groupby(keys, dropna=False)[SUM_COLUMNS].sum()
+    group_of_cell = cells.set_index('cell_id')[keys]
+
+    # 5-1. HLL: 그룹별로 레지스터 max → 추정
+    hll = sketches['hll'].merge(group_of_cell, left_on='cell_id', right_index=True)
+    hll = hll.groupby(keys + ['register'], dropna=False)['rank'].max()
+    result['distinct_influencers'] = hll.groupby(level=keys, dropna=False).agg(hll_estimate).round()
+
+    # 5-2. 분위수: 그룹별로 버킷 개수 sum → p50 / p90
+    quantile = sketches['quantile'].merge(group_of_cell, left_on='cell_id', right_index=True)
+    quantile = quantile.groupby(keys + ['metric', 'key'], dropna=False, as_index=False)['count'].sum()
+    for metric in METRICS:
+        buckets = quantile[quantile['metric'] == metric].groupby(keys, dropna=False)[['key', 'count']]
+        for q in (0.5, 0.9):
+            result[f'{metric}_p{int(q * 100)}'] = buckets.apply(
+                lambda g, q=q: quantile_from_buckets(g['key'].to_numpy(), g['count'].to_numpy(), q)
+            )
+
+    result = result.reset_index()
+    return result.drop(columns='_group') if not group_by else result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="성과 데이터 요약본(HLL / 분위수 스케치)을 만들거나 갱신합니다.")
+    parser.add_argument('--full', action='store_true', help="저장된 요약본을 무시하고 전체 재생성")
+    parser.add_argument('--base-path', default=BASE_PATH, help="CSV 폴더 경로 (기본값: table/)")
+    args = parser.parse_args()
+
+    # (대시보드가 띄운 갱신과 동시에 실행되지 않도록 잠금)
+    lock = background_jobs.acquire('perf_sketches', args.base_path)
+    if lock is None:
+        print("이미 요약본을 갱신하는 중입니다.")
+        raise SystemExit(0)
+    try:
+        # (성공/실패를 기록 → 같은 입력으로 실패했으면 대시보드가 갱신을 반복해서 띄우지 않음)
+        status_key = source_key(args.base_path)
+        try:
+            built = load_or_build(args.base_path, full=args.full)
+        except Exception as e:
+            background_jobs.save_status('perf_sketches', status_key, f"{type(e).__name__}: {e}", args.base_path)
+            raise
+        background_jobs.save_status('perf_sketches', status_key, base_path=args.base_path)
+    finally:
+        background_jobs.release(lock)
+    print(f"요약본: 칸 {len(built['cells']):,}개 / HLL 레지스터 {len(built['hll']):,}개 / 분위수 버킷 {len(built['quantile']):,}개")
+    print(query(built, group_by=['platform']).to_string(index=False))